@@ -1,17 +1,323 @@
-from flask import Flask, jsonify, request, abort
+import os
+import secrets
+import tempfile
+import time
+from collections import Counter
+from itertools import islice
+
+from flask import Flask, Response, jsonify, request, abort, send_file, url_for
 from flask_restful import Api
 
+import sqlite_store
+from images import (DEFAULT_MAX_IMAGE_SIZE, MAX_MULTIPART_OVERHEAD, ImageStore, ImageTooLargeError, InvalidImageError,
+                    open_multipart_file, sniff_chunks)
+from jsonprovider import FastJSONProvider
+from jsonstream import (INVALID_LINE, iter_json_array, iter_ndjson, iter_pages, stream_json_array,
+                        stream_json_object, stream_ndjson)
+from metrics import ENDPOINT_KEY, Metrics, MetricsMiddleware
+from pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_limit
+from passwords import DEFAULT_PASSWORD_COST, PasswordHasher, PasswordPoolFullError
+from ratelimit import RateLimit, RateLimitMiddleware, parse_rate_limits
+from representations import RepresentationCache
+from sessions import DEFAULT_SESSION_TTL, SessionManager
+from thumbnails import DERIVATIVE_SIZES, ThumbnailPool
+from store import (DuplicateError, InsufficientQuantityError, Inventory, OrderStore, PetImageStore, PetStore,
+                   RevokedSessionStore, UserStore)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 api = Api(app)
 
-# Dummy data to simulate a database
-pets = []
-inventory = {}
-orders = []
-users = []
+# Keep the data in memory, or in a SQLite database shared by all workers if PETSTORE_DATABASE is set
+if os.environ.get('PETSTORE_DATABASE'):
+    pets, inventory, orders, users, pet_images, revoked_sessions = sqlite_store.open_stores(
+        os.environ['PETSTORE_DATABASE'])
+    etag_prefix = 'db'
+else:
+    pets = PetStore()
+    inventory = Inventory()
+    orders = OrderStore()
+    users = UserStore()
+    pet_images = PetImageStore()
+    revoked_sessions = RevokedSessionStore()
+    # Versions of the in-memory stores restart with the process, so ETags are tagged with its start time
+    etag_prefix = format(time.time_ns(), 'x')
+
+# Uploaded images are stored on disk, in PETSTORE_IMAGE_DIR if it is set
+images = ImageStore(os.environ.get('PETSTORE_IMAGE_DIR', os.path.join(tempfile.gettempdir(), 'petstore-images')),
+                    int(os.environ.get('PETSTORE_MAX_IMAGE_SIZE', DEFAULT_MAX_IMAGE_SIZE)))
+
+# Resized copies of uploaded images are generated in the background by a pool of worker processes
+thumbnail_pool = ThumbnailPool(images, int(os.environ.get('PETSTORE_THUMBNAIL_WORKERS', 2)))
+
+# Passwords are hashed and checked on a bounded pool of threads, at the cost set by PETSTORE_PASSWORD_COST
+password_hasher = PasswordHasher(int(os.environ.get('PETSTORE_PASSWORD_COST', DEFAULT_PASSWORD_COST)),
+                                 int(os.environ.get('PETSTORE_PASSWORD_WORKERS', 2)))
+
+# Session tokens are signed with PETSTORE_SESSION_SECRET, or a random key shared by the workers forked from this process
+session_secret = os.environ.get('PETSTORE_SESSION_SECRET')
+sessions = SessionManager(session_secret.encode('utf-8') if session_secret else secrets.token_bytes(32),
+                          revoked_sessions, int(os.environ.get('PETSTORE_SESSION_TTL', DEFAULT_SESSION_TTL)))
+
+# Requests per second and burst allowed per client on the routes a client could flood; PETSTORE_RATE_LIMITS replaces
+# them with '<endpoint>=<rate>/<burst>[:ip|:client]' entries, or disables rate limiting if empty
+DEFAULT_RATE_LIMITS = {
+    'login_user': RateLimit(10, 20),
+    'find_pet_by_status': RateLimit(50, 100, per='client'),
+}
+
+
+def rate_limit_client(environ):
+    """
+    Identify the client of a request to a route rate limited per client.
+
+    Parameters:
+    - environ (dict): The WSGI environ of the request.
+
+    Returns:
+    - str: The user the request's session token was issued to, or None if it has no valid token.
+    """
+    scheme, _, token = environ.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    user_id = sessions.validate(token.strip())
+    return f'user:{user_id}' if user_id is not None else None
+
+
+rate_limits = (parse_rate_limits(os.environ['PETSTORE_RATE_LIMITS']) if 'PETSTORE_RATE_LIMITS' in os.environ
+               else DEFAULT_RATE_LIMITS)
+app.wsgi_app = RateLimitMiddleware(app.wsgi_app, app.url_map, rate_limits, rate_limit_client)
+
+# Latency, sizes and status codes of every request, including those rejected by the rate limiter, served at /metrics
+metrics = Metrics()
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics)
+
+
+@app.before_request
+def tag_endpoint():
+    # Label the request's metrics with the endpoint it was routed to
+    request.environ[ENDPOINT_KEY] = request.endpoint
+
+
+# Encoded responses of single resources, reused until the resource changes
+representations = RepresentationCache()
+
+# Number of records of a bulk import that are validated and stored together
+BULK_BATCH_SIZE = 1000
+
+# Largest body of a bulk import whose size is known up front, unless PETSTORE_MAX_BULK_SIZE is set
+DEFAULT_MAX_BULK_SIZE = 256 * 1024 * 1024
+max_bulk_size = int(os.environ.get('PETSTORE_MAX_BULK_SIZE', DEFAULT_MAX_BULK_SIZE))
+
+# Largest request body of the endpoints without a limit of their own, when a server buffers bodies
+DEFAULT_MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+def max_body_size(endpoint):
+    """
+    Return the largest request body an endpoint accepts, for servers that receive bodies before the view runs.
+
+    Parameters:
+    - endpoint (str): The endpoint the request is routed to, or None if it matches no route.
+
+    Returns:
+    - int: The size limit in bytes.
+    """
+    if endpoint == 'upload_image':
+        return images.max_size + MAX_MULTIPART_OVERHEAD
+    if endpoint == 'add_pets_bulk':
+        return max_bulk_size
+    return DEFAULT_MAX_BODY_SIZE
+
+
+# Page size of a paginated listing when only a cursor is given
+DEFAULT_PAGE_SIZE = 100
+
+
+def get_page_args():
+    """
+    Read the pagination query parameters of a listing.
+
+    Returns:
+    - tuple: The ID to list after and the page size, or None if the client didn't ask for a page.
+    """
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+
+    # Return 400 if the pagination parameters are invalid
+    try:
+        limit = parse_limit(request.args.get('limit', str(DEFAULT_PAGE_SIZE)))
+    except ValueError:
+        abort(400, f'Limit parameter is invalid; should be between 1 and {MAX_PAGE_SIZE}')
+    try:
+        after_id = decode_cursor(request.args['cursor']) if 'cursor' in request.args else 0
+    except ValueError:
+        abort(400, 'Cursor parameter is invalid')
+
+    return after_id, limit
+
+
+def page_response(items, id_field, limit):
+    """
+    Build the response body of a page of a listing.
+
+    Parameters:
+    - items (list): The items of the page, plus the first item of the next page if there is one.
+    - id_field (str): The name of the ID field of the items.
+    - limit (int): The page size.
+
+    Returns:
+    - dict: The items of the page, and a link to the next page or None if this is the last one.
+    """
+    next_link = None
+    if len(items) > limit:
+        items = items[:limit]
+        args = {**request.args.to_dict(), 'cursor': encode_cursor(items[-1][id_field]), 'limit': limit}
+        next_link = url_for(request.endpoint, **args)
+    return {'items': items, 'next': next_link}
+
+
+def encode_json(value):
+    """
+    Encode a value to compact JSON with the app's JSON provider.
+
+    Parameters:
+    - value: The value to encode.
+
+    Returns:
+    - str: The JSON text.
+    """
+    return app.json.dumps(value)
+
+
+def encode_body(value):
+    """
+    Encode a value to a JSON response body, as jsonify would.
+
+    Parameters:
+    - value: The value to encode.
+
+    Returns:
+    - bytes: The encoded body.
+    """
+    return f'{encode_json(value)}\n'.encode()
+
+
+def conditional_response(key, version, encode):
+    """
+    Respond with a version of a resource and a strong ETag derived from the version.
+
+    A client that already holds the version is answered with 304 Not Modified without encoding the resource.
+
+    Parameters:
+    - key (tuple): The kind and ID of the resource.
+    - version (int): The current version of the resource.
+    - encode (callable): Called without arguments to get the encoded resource if the client doesn't hold it.
+
+    Returns:
+    - Response: The 200 response with the encoded resource, or an empty 304 response.
+    """
+    etag = '-'.join([etag_prefix, *map(str, key), str(version)])
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(encode(), mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+def cached_response(key, version, resource):
+    """
+    Respond conditionally with a version of a resource, encoding each version only once.
+
+    Parameters:
+    - key (tuple): The kind and ID of the resource.
+    - version (int): The version of the resource.
+    - resource: The resource at that version.
+
+    Returns:
+    - Response: The 200 response with the encoded resource, or an empty 304 response.
+    """
+    return conditional_response(key, version, lambda: representations.get(key, version, lambda: encode_body(resource)))
+
+
+def get_stream_format():
+    """
+    Read whether the client asked for a listing to be streamed.
+
+    Returns:
+    - str: 'ndjson' if the client prefers application/x-ndjson, 'json' for a streamed JSON array if the stream
+      query parameter is 'true', or None if the listing should not be streamed.
+    """
+    best_match = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    if best_match == 'application/x-ndjson':
+        return 'ndjson'
+    if request.args.get('stream') == 'true':
+        return 'json'
+    return None
+
+
+def stream_response(items, stream_format):
+    """
+    Build a chunked response that encodes items as they are sent.
+
+    Parameters:
+    - items (iterable): The items of the listing.
+    - stream_format (str): 'ndjson' for one item per line, or 'json' for a JSON array.
+
+    Returns:
+    - Response: The streamed response.
+    """
+    if stream_format == 'ndjson':
+        return Response(stream_ndjson(items, encode_json), mimetype='application/x-ndjson')
+    return Response(stream_json_array(items, encode_json), mimetype='application/json')
 
 
 # /pet related endpoints/functions
+def validate_new_pet(data):
+    """
+    Check the data of a new pet.
+
+    Parameters:
+    - data (dict): The pet data sent by the client.
+
+    Returns:
+    - str: The error message describing why the data is invalid, or None if it is valid.
+    """
+    # Data is missing
+    if 'name' not in data:
+        return 'Bad or missing data. Missing name field'
+    if 'category' not in data:
+        return 'Bad or missing data. Missing category field'
+    if 'status' not in data:
+        return 'Bad or missing data. Missing status field'
+
+    return validate_pet_fields(data)
+
+
+def validate_pet_fields(data):
+    """
+    Check the fields of pet data that are present, for a new pet or an update.
+
+    Parameters:
+    - data (dict): The pet data sent by the client.
+
+    Returns:
+    - str: The error message describing why the data is invalid, or None if it is valid.
+    """
+    for field in ('name', 'category', 'status'):
+        if field not in data:
+            continue
+        # Data is not text
+        if not isinstance(data[field], str):
+            return f'Bad or missing data. {field.capitalize()} must be a string'
+        # Data is too long
+        if len(data[field]) > 100:
+            return f'Bad or missing data. {field.capitalize()} too long'
+
+    return None
+
+
 @app.route('/pet', methods=['POST'])
 def add_pet():
     """
@@ -31,28 +337,13 @@ def add_pet():
     """
     data = request.get_json()
 
-    # Return 400 if data is missing
-    if 'name' not in data:
-        abort(400, 'Bad or missing data. Missing name field')
-    if 'category' not in data:
-        abort(400, 'Bad or missing data. Missing category field')
-    if 'status' not in data:
-        abort(400, 'Bad or missing data. Missing status field')
-
-    # Check and return 400 if data is too long
-    if len(data['name']) > 100:
-        abort(400, 'Bad or missing data. Name too long')
-    if len(data['category']) > 100:
-        abort(400, 'Bad or missing data. Category too long')
-    if len(data['status']) > 100:
-        abort(400, 'Bad or missing data. Status too long')
-
-    # Return 400 if data is duplicated
-    if any(pet['name'] == data['name'] and pet['category'] == data['category'] for pet in pets):
-        abort(400, 'Pet with the same name and category already exists')
+    # Return 400 if data is missing or too long
+    error = validate_new_pet(data)
+    if error:
+        abort(400, error)
 
     # Build pet object
-    pet_id = len(pets) + 1
+    pet_id = pets.next_id()
     new_pet = {
         'id': pet_id,
         'name': data['name'],
@@ -60,19 +351,136 @@ def add_pet():
         'status': data['status']
     }
 
-    # Add pet to the database
-    pets.append(new_pet)
+    # Add pet to the database, returning 400 if data is duplicated
+    try:
+        pets.add(new_pet)
+    except DuplicateError:
+        abort(400, 'Pet with the same name and category already exists')
 
     # Add the pet category to the inventory with an initial quantity of 1 if it doesn't exist
-    if new_pet['category'] not in inventory:
-        inventory[new_pet['category']] = 1
-    else:
-        inventory[new_pet['category']] += 1  # Increment category quantity by 1
+    inventory.increment(new_pet['category'])
 
     # Return the new pet with a status code of 201
     return jsonify(new_pet), 201
 
 
+@app.route('/pet/bulk', methods=['POST'])
+def add_pets_bulk():
+    """
+    Add many pets to the Pet Store in one request.
+    POST /pet/bulk
+
+    Request Body:
+    - A JSON array of pets, or one pet per line with a Content-Type of application/x-ndjson. Each pet has the same
+      fields as for POST /pet. The body is parsed as it arrives, without buffering all of it.
+
+    Returns:
+    - The result of each pet, in order, with a status code of 200. A result holds the pet's index and either a status
+      of 201 with the added pet, or a status of 400 with the same message POST /pet would return. The results are
+      streamed as each batch of pets is stored, in a JSON object followed by the number of pets added and failed, or
+      on their own as a JSON array if the stream query parameter is 'true', or one per line if the client prefers
+      application/x-ndjson.
+    - If the Content-Length is larger than PETSTORE_MAX_BULK_SIZE, return a JSON message indicating 'Bulk import too
+      large' with a status code of 413, before reading the body.
+    - If the body isn't a valid JSON array, return a JSON message indicating 'Bad or missing data. Invalid JSON array'
+      with a status code of 400. If the invalid data comes after whole batches of pets have already been added, the
+      results of those pets are returned instead, with a status code of 200, followed by a result with a status of 400
+      and that message at the index of the first pet that wasn't added.
+    """
+    if request.content_length is not None and request.content_length > max_bulk_size:
+        abort(413, 'Bulk import too large')
+
+    if request.mimetype == 'application/x-ndjson':
+        records = iter_ndjson(request.stream, loads=app.json.loads)
+    else:
+        records = iter_json_array(request.stream)
+
+    # Parse the first batch before responding, so a body that isn't a JSON array is rejected with a 400
+    try:
+        first_batch = list(islice(records, BULK_BATCH_SIZE))
+    except ValueError:
+        abort(400, 'Bad or missing data. Invalid JSON array')
+
+    def iter_results():
+        batch, index = first_batch, 0
+        try:
+            while batch:
+                yield from add_pet_batch(batch, index)
+                index += len(batch)
+                batch = list(islice(records, BULK_BATCH_SIZE))
+        except ValueError:
+            # Earlier batches are already stored, so their pets' IDs must reach the client
+            yield {'index': index, 'status': 400, 'message': 'Bad or missing data. Invalid JSON array'}
+
+    # Stream the results as they are stored, so only one batch is in memory
+    stream_format = get_stream_format()
+    if stream_format:
+        return stream_response(iter_results(), stream_format)
+    return Response(stream_bulk_summary(iter_results()), mimetype='application/json')
+
+
+def stream_bulk_summary(results):
+    """
+    Encode the results of a bulk import as a JSON object, followed by the number of pets added and failed.
+
+    Parameters:
+    - results (iterable): The result of each pet, in order.
+
+    Yields:
+    - bytes: Consecutive chunks of the JSON object.
+    """
+    counts = Counter()
+
+    def counted_results():
+        for result in results:
+            counts['added' if result['status'] == 201 else 'failed'] += 1
+            yield result
+
+    yield b'{"results":'
+    yield from stream_json_array(counted_results(), encode_json)
+    yield f',"added":{counts["added"]},"failed":{counts["failed"]}}}\n'.encode()
+
+
+def add_pet_batch(records, first_index):
+    """
+    Validate and store a batch of pets from a bulk import.
+
+    Parameters:
+    - records (list): The pet data sent by the client.
+    - first_index (int): The index of the first record in the whole import.
+
+    Returns:
+    - list: The result of each record, in order.
+    """
+    results = []
+    new_pets = []
+    for index, data in enumerate(records, first_index):
+        if data is INVALID_LINE:
+            error = 'Bad or missing data. Invalid JSON'
+        elif not isinstance(data, dict):
+            error = 'Bad or missing data. Expected a JSON object'
+        else:
+            error = validate_new_pet(data)
+        if error:
+            results.append({'index': index, 'status': 400, 'message': error})
+            continue
+        new_pet = {'name': data['name'], 'category': data['category'], 'status': data['status']}
+        new_pets.append(new_pet)
+        results.append({'index': index, 'status': 201, 'pet': new_pet})
+
+    # Store the valid pets and update the inventory once for the whole batch
+    for new_pet, pet_id in zip(new_pets, pets.next_ids(len(new_pets))):
+        new_pet['id'] = pet_id
+    added = iter(pets.add_many(new_pets))
+    for result in results:
+        if result['status'] == 201 and not next(added):
+            result.update(status=400, message='Pet with the same name and category already exists')
+            del result['pet']
+    inventory.increment_many(Counter(result['pet']['category'] for result in results if result['status'] == 201))
+
+    return results
+
+
 @app.route('/pet/<int:pet_id>', methods=['GET'])
 def get_pet(pet_id):
     """
@@ -83,15 +491,17 @@ def get_pet(pet_id):
     - pet_id (int): The unique identifier of the pet to retrieve.
 
     Returns:
-    - If the pet is found, return the pet's information with a status code of 200.
+    - If the pet is found, return the pet's information with a status code of 200, or an empty response with a
+      status code of 304 if the If-None-Match header holds its current ETag.
     - If the pet is not found, return a JSON message indicating 'Pet not found' with a status code of 404.
     """
     # Retrieve the pet by ID
-    pet = next((p for p in pets if p['id'] == pet_id), None)
+    versioned_pet = pets.get_versioned(pet_id)
 
     # Check if the pet is found
-    if pet:
-        return jsonify(pet), 200
+    if versioned_pet:
+        pet, version = versioned_pet
+        return cached_response(('pet', pet_id), version, pet)
     else:
         # Return a JSON message for a not-found pet with status code 404
         return jsonify({'message': 'Pet not found'}), 404
@@ -121,58 +531,33 @@ def update_pet(pet_id):
     # Retrieve payload data
     data = request.get_json()
 
-    # Retrieve the pet by ID
-    existing_pet = next((pet for pet in pets if pet['id'] == pet_id), None)
-
     # Return 404 if pet isn't found
-    if not existing_pet:
+    if not pets.get(pet_id):
         abort(404, 'Pet not found')
 
-    # Store the old category for inventory management
-    old_category = existing_pet['category']
-
-    # Return 400 if the update would result in a duplicate pet
-    if 'name' in data:
-        if any(
-            pet['name'] == data['name']
-            and pet['category'] == data['category']
-            and pet['id'] != pet_id
-            for pet in pets
-        ):
-            abort(400, 'Pet with the same name and category already exists')
-
-    # Update the pet with the provided data
-    if 'name' in data:
-        # Check and update the name, if provided
-        if len(data['name']) > 100:
-            abort(400, 'Bad or missing data. Name too long')
-        existing_pet['name'] = data['name']
-
-    if 'category' in data:
-        # Check and update the category, if provided
-        if len(data['category']) > 100:
-            abort(400, 'Bad or missing data. Category too long')
-        existing_pet['category'] = data['category']
-
-    if 'status' in data:
-        # Check and update the status, if provided
-        if len(data['status']) > 100:
-            abort(400, 'Bad or missing data. Status too long')
-        existing_pet['status'] = data['status']
-
-    # If the category has been changed, update the inventory
-    if old_category != existing_pet['category']:
-        # Decrease inventory for the old category
-        if old_category in inventory and inventory[old_category] > 0:
-            inventory[old_category] -= 1
-            if inventory[old_category] == 0:
-                del inventory[old_category]  # Optional: Remove category if quantity is zero
-
-        # Add to inventory for the new category
-        if existing_pet['category'] in inventory:
-            inventory[existing_pet['category']] += 1
-        else:
-            inventory[existing_pet['category']] = 1  # Initialize new category with default quantity 1
+    # Check the provided data before applying any of it
+    if not isinstance(data, dict):
+        abort(400, 'Bad or missing data. Expected a JSON object')
+    error = validate_pet_fields(data)
+    if error:
+        abort(400, error)
+
+    # Update the pet with the provided data, returning 400 if it would result in a duplicate pet
+    changes = {field: data[field] for field in ('name', 'category', 'status') if field in data}
+    try:
+        result = pets.update(pet_id, changes)
+    except DuplicateError:
+        abort(400, 'Pet with the same name and category already exists')
+
+    # Return 404 if the pet was deleted in the meantime
+    if not result:
+        abort(404, 'Pet not found')
+    old_pet, existing_pet = result
+
+    # If the category has been changed, move the pet to the new category in the inventory
+    if old_pet['category'] != existing_pet['category']:
+        inventory.decrement(old_pet['category'])
+        inventory.increment(existing_pet['category'])
 
     # Return the updated pet with a status code of 200
     return jsonify(existing_pet), 200
@@ -191,22 +576,15 @@ def delete_pet(pet_id):
     - If the pet is found and successfully deleted, return a JSON message indicating 'Pet deleted' with a status code of 204 (No Content).
     - If the pet is not found, return a JSON message indicating 'Pet not found' with a status code of 404.
     """
-    global pets
-
-    # Retrieve the pet by ID
-    pet = next((p for p in pets if p['id'] == pet_id), None)
+    # Remove the pet from the database
+    pet = pets.delete(pet_id)
 
     # Check if the pet is found
     if pet:
-        # Remove the pet from the database
-        pets = [p for p in pets if p['id'] != pet_id]
 
         # Reduce the category quantity from the inventory if it exists
-        if pet['category'] in inventory and inventory[pet['category']] > 0:
-            inventory[pet['category']] -= 1
-            # Optional: Remove category if quantity is zero
-            if inventory[pet['category']] == 0:
-                del inventory[pet['category']]
+        inventory.decrement(pet['category'])
+        pet_images.delete(pet_id)
 
         return jsonify({'message': 'Pet deleted'}), 204
     else:
@@ -222,11 +600,17 @@ def find_pet_by_status():
 
     Query Parameters:
     - status (str): The status of the pets to retrieve. Should be one of 'available', 'pending', or 'sold'.
+    - limit (int, optional): The page size, between 1 and 1000. Defaults to 100 when only a cursor is given.
+    - cursor (str, optional): The cursor of the page to retrieve, taken from the 'next' link of the previous page.
+    - stream (str, optional): 'true' to stream all found pets as a JSON array. Sending an Accept header of
+      application/x-ndjson streams them one per line instead.
 
     Returns:
     - If the status parameter is missing, return a JSON message indicating 'Status parameter is missing' with a status code of 400.
     - If the status parameter is invalid, return a JSON message indicating 'Status parameter is invalid; should be available, pending, or sold' with a status code of 400.
-    - If pets are found with the specified status, return the list of pets with a status code of 200.
+    - If the limit or cursor parameter is invalid, return a JSON message indicating so with a status code of 400.
+    - If a page is requested, return the pets of the page and a 'next' link to the following page with a status code of 200.
+    - Otherwise, return the list of pets found with the specified status with a status code of 200.
     """
     status = request.args.get('status')
 
@@ -238,8 +622,21 @@ def find_pet_by_status():
     if status not in ["available", "pending", "sold"]:
         abort(400, 'Status parameter is invalid; should be available, pending, or sold')
 
+    # Return a page of the pets with the specified status if one is requested
+    page_args = get_page_args()
+    if page_args:
+        after_id, limit = page_args
+        found_pets = pets.find_by_status(status, after_id, limit + 1)
+        return jsonify(page_response(found_pets, 'id', limit)), 200
+
+    # Stream all pets with the specified status, one page from the store at a time, if requested
+    stream_format = get_stream_format()
+    if stream_format:
+        fetch_page = lambda after_id, limit: pets.find_by_status(status, after_id, limit)  # noqa: E731
+        return stream_response(iter_pages(fetch_page, 'id'), stream_format)
+
     # Find pets with the specified status
-    found_pets = [pet for pet in pets if pet['status'] == status]
+    found_pets = pets.find_by_status(status)
 
     # Return the found pets with a status code of 200
     return jsonify(found_pets), 200
@@ -255,33 +652,112 @@ def upload_image(pet_id):
     - pet_id (int): The unique identifier of the pet for which to upload an image.
 
     Request Form Data:
-    - file (file): The image file to upload.
+    - file (file): The image file to upload. It is streamed to disk as it arrives, without buffering the body.
 
     Returns:
-    - If the pet is found and the image is successfully uploaded, return a JSON message indicating 'File uploaded successfully' with a status code of 201.
+    - If the pet is found and the image is successfully uploaded, return a JSON message indicating 'File uploaded successfully' with a status code of 201, along with the image's SHA-256 digest, size, content type and the status of its resized copies: 'pending' while they are generated in the background, then 'ready' or 'failed', or 'unavailable' if the background queue is full.
     - If the pet is not found, return a JSON message indicating 'Pet not found' with a status code of 404.
     - If there is no file part in the request, return a JSON message indicating 'No file part' with a status code of 400.
     - If no selected file is provided, return a JSON message indicating 'No selected file' with a status code of 400.
+    - If the file isn't a JPEG, PNG, GIF or WebP image, return a JSON message indicating 'Invalid file type' with a status code of 400, as soon as its first bytes are read.
+    - If the image is larger than PETSTORE_MAX_IMAGE_SIZE, return a JSON message indicating 'Image too large' with a status code of 413, before reading the body if its Content-Length is already too large.
     """
-    pet = next((p for p in pets if p['id'] == pet_id), None)
+    pet = pets.get(pet_id)
 
     # Return 404 if the pet is not found
     if not pet:
         return jsonify({'message': 'Pet not found'}), 404
 
-    # Return 400 if there is no file part in the request
-    if 'file' not in request.files:
+    # Return 413 before reading the body if it can't hold an image small enough
+    if request.content_length is not None and request.content_length > images.max_size + MAX_MULTIPART_OVERHEAD:
+        abort(413, 'Image too large')
+
+    # Return 400 if there is no file part in the request; the body is parsed as it is read instead of by request.files
+    boundary = request.mimetype_params.get('boundary')
+    part = None
+    if request.mimetype == 'multipart/form-data' and boundary:
+        try:
+            part = open_multipart_file(request.stream, boundary.encode('latin-1'), 'file')
+        except ValueError:
+            abort(400, 'Bad or missing data. Invalid multipart body')
+    if part is None:
         abort(400, 'No file part')
 
-    file = request.files['file']
+    file, chunks = part
 
     # Return 400 if no selected file is provided
     if file.filename == '':
         abort(400, 'No selected file')
 
-    # Upload functionality TBD
-    # For simplicity, just return a success message
-    return jsonify({'message': 'File uploaded successfully'}), 201
+    # Identify the format from the first bytes, then stream the image to disk, storing identical images once
+    try:
+        content_type, chunks = sniff_chunks(chunks)
+        digest, size = images.save(chunks)
+    except InvalidImageError:
+        abort(400, 'Invalid file type. Only JPEG, PNG, GIF and WebP images are accepted')
+    except ImageTooLargeError:
+        abort(413, 'Image too large')
+    except ValueError:
+        abort(400, 'Bad or missing data. Invalid multipart body')
+
+    pet_images.set(pet_id, {'digest': digest, 'size': size, 'contentType': content_type, 'thumbnails': 'pending'})
+
+    # Generate the resized copies in the background, so the upload doesn't wait for image processing
+    def on_thumbnails_done(succeeded):
+        pet_images.set_thumbnails(pet_id, digest, 'ready' if succeeded else 'failed')
+
+    if not thumbnail_pool.submit(digest, on_thumbnails_done):
+        pet_images.set_thumbnails(pet_id, digest, 'unavailable')
+
+    return jsonify({'message': 'File uploaded successfully', **pet_images.get(pet_id)}), 201
+
+
+@app.route('/pet/<int:pet_id>/image', methods=['GET'])
+def get_pet_image(pet_id):
+    """
+    Download the image of a pet in the Pet Store by ID.
+    GET /pet/:pet_id/image
+
+    Parameters:
+    - pet_id (int): The unique identifier of the pet whose image to download.
+
+    Query Parameters:
+    - size (int, optional): 128 or 512 to download a WebP copy of the image resized to fit that many pixels. The
+      original is returned until the resized copy is ready.
+
+    Returns:
+    - If the pet has an image, return it with a status code of 200. The file is sent with sendfile where the server
+      supports it, Range requests are answered with 206, and the file's digest is its ETag, so a matching
+      If-None-Match is answered with 304. The X-Thumbnail-Status header holds the status of the resized copies.
+    - If the size parameter is invalid, return a JSON message with a status code of 400.
+    - If the pet is not found, return a JSON message indicating 'Pet not found' with a status code of 404.
+    - If the pet has no image, return a JSON message indicating 'Image not found' with a status code of 404.
+    """
+    size = request.args.get('size')
+    if size is not None and size not in map(str, DERIVATIVE_SIZES):
+        abort(400, f"Size parameter is invalid; should be {' or '.join(map(str, DERIVATIVE_SIZES))}")
+
+    if not pets.get(pet_id):
+        return jsonify({'message': 'Pet not found'}), 404
+
+    image = pet_images.get(pet_id)
+    if not image or not os.path.exists(images.path(image['digest'])):
+        return jsonify({'message': 'Image not found'}), 404
+
+    # Serve the resized copy if it is ready, and the original otherwise
+    path = images.path(image['digest'])
+    mimetype = image['contentType']
+    etag = image['digest']
+    if size and image['thumbnails'] == 'ready' and os.path.exists(images.derivative_path(image['digest'], int(size))):
+        path = images.derivative_path(image['digest'], int(size))
+        mimetype = 'image/webp'
+        etag = f"{image['digest']}-{size}"
+
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+    # A new upload changes the image behind the URL, so clients revalidate with the ETag before reusing it
+    response.cache_control.no_cache = True
+    response.headers['X-Thumbnail-Status'] = image['thumbnails']
+    return response
 
 
 # /inventory related endpoints
@@ -291,10 +767,26 @@ def get_inventory():
     Retrieve the inventory of the Pet Store by category.
     GET /store/inventory
 
+    Query Parameters:
+    - stream (str, optional): 'true' to stream the inventory. Sending an Accept header of application/x-ndjson
+      streams one {"category", "quantity"} object per line instead.
+
     Returns:
-    - The store's inventory as a JSON object with a status code of 200.
+    - The store's inventory as a JSON object with a status code of 200, or an empty response with a status code
+      of 304 if the If-None-Match header holds its current ETag.
     """
-    return jsonify(inventory), 200
+    # The snapshot is never modified once published, so it can be read and encoded without locking
+    snapshot = inventory.current()
+
+    # Stream the inventory if requested
+    stream_format = get_stream_format()
+    if stream_format == 'ndjson':
+        lines = ({'category': category, 'quantity': quantity} for category, quantity in snapshot.quantities.items())
+        return stream_response(lines, stream_format)
+    if stream_format == 'json':
+        return Response(stream_json_object(snapshot.quantities.items(), encode_json), mimetype='application/json')
+
+    return conditional_response(('inventory',), snapshot.version, lambda: snapshot.encoded(encode_body))
 
 
 @app.route('/store/inventory/add', methods=['POST'])
@@ -323,17 +815,12 @@ def add_to_inventory():
     category = data['category']
     quantity = data['quantity']
 
-    # Return 404 if the specified pet is not found in the inventory
-    if category not in inventory:
+    # Update inventory by adding the specified quantity, returning 404 if the category is not in the inventory
+    try:
+        inventory.add(category, quantity)
+    except KeyError:
         abort(404, 'Pet category not found in inventory')
 
-    # If the category is not in the inventory, initialize it
-    if category not in inventory:
-        inventory[category] = 0
-
-    # Update inventory by adding the specified quantity
-    inventory[category] += quantity
-
     # Return a JSON message indicating the added quantity with a status code of 200
     return jsonify({'message': f'Added {quantity} to inventory for category {category}'}), 200
 
@@ -364,25 +851,99 @@ def remove_from_inventory():
     category = data['category']
     quantity = data['quantity']
 
-    # Check if the category exists in the inventory
-    if category not in inventory:
+    # Update inventory by removing the specified quantity; the category is removed once its quantity is zero
+    try:
+        inventory.remove(category, quantity)
+    except KeyError:
         abort(400, 'Category not found in inventory')
-
-    # Check if the inventory has enough quantity
-    if inventory[category] < quantity:
+    except InsufficientQuantityError:
         abort(400, 'Not enough quantity in inventory')
 
-    # Update inventory by removing the specified quantity
-    inventory[category] -= quantity
-
-    # Optional: Remove category if quantity is zero
-    if inventory[category] == 0:
-        del inventory[category]
-
     # Return a JSON message indicating the removed quantity
     return jsonify({'message': f'Removed {quantity} from inventory for category {category}'})
 
 
+def validate_adjustment(adjustment):
+    """
+    Check an adjustment of a batch inventory request.
+
+    Parameters:
+    - adjustment: The adjustment sent by the client.
+
+    Returns:
+    - str: The error message describing why the adjustment is invalid, or None if it is valid.
+    """
+    if not isinstance(adjustment, dict):
+        return 'Bad or missing data. Expected a JSON object'
+    for field in ('operation', 'category', 'quantity'):
+        if field not in adjustment:
+            return f'Bad or missing data. Missing {field} field'
+    if adjustment['operation'] not in ('add', 'remove'):
+        return 'Bad or missing data. Operation should be add or remove'
+    if not isinstance(adjustment['category'], str):
+        return 'Bad or missing data. Category must be a string'
+    quantity = adjustment['quantity']
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        return 'Bad or missing data. Quantity must be a positive integer'
+    return None
+
+
+@app.route('/store/inventory/batch', methods=['POST'])
+def adjust_inventory_batch():
+    """
+    Add to and remove from many categories of the inventory in one atomic request.
+    POST /store/inventory/batch
+
+    Request JSON Body:
+    - A JSON array of adjustments, applied in order. Each adjustment has an operation of 'add' or 'remove', and the
+      same category and quantity fields as POST /store/inventory/add and POST /store/inventory/remove.
+
+    Returns:
+    - If every adjustment applies, return the result of each adjustment with a status code of 200. A result holds the
+      adjustment's index, a status of 200 and the message the single add or remove would return.
+    - If any adjustment fails, nothing is applied; return the result of each adjustment with a status code of 400.
+      Failed adjustments have the status and message the single add or remove would return, and the others have a
+      status of 424 with the message 'Not applied because another adjustment failed'.
+    - If the body isn't a JSON array, return a JSON message with a status code of 400.
+    """
+    data = request.get_json()
+    if not isinstance(data, list):
+        abort(400, 'Bad or missing data. Expected a JSON array')
+
+    # Validate every adjustment before touching the inventory
+    results = []
+    for index, adjustment in enumerate(data):
+        error = validate_adjustment(adjustment)
+        if error:
+            results.append({'index': index, 'status': 400, 'message': error})
+        elif adjustment['operation'] == 'add':
+            message = f"Added {adjustment['quantity']} to inventory for category {adjustment['category']}"
+            results.append({'index': index, 'status': 200, 'message': message})
+        else:
+            message = f"Removed {adjustment['quantity']} from inventory for category {adjustment['category']}"
+            results.append({'index': index, 'status': 200, 'message': message})
+
+    # Apply all the adjustments under a single lock or transaction, which changes nothing if any of them fails
+    if all(result['status'] == 200 for result in results):
+        errors = inventory.apply([(adjustment['operation'], adjustment['category'], adjustment['quantity'])
+                                  for adjustment in data])
+        for result, adjustment, error in zip(results, data, errors):
+            if isinstance(error, KeyError) and adjustment['operation'] == 'add':
+                result.update(status=404, message='Pet category not found in inventory')
+            elif isinstance(error, KeyError):
+                result.update(status=400, message='Category not found in inventory')
+            elif isinstance(error, InsufficientQuantityError):
+                result.update(status=400, message='Not enough quantity in inventory')
+
+    applied = all(result['status'] == 200 for result in results)
+    if not applied:
+        for result in results:
+            if result['status'] == 200:
+                result.update(status=424, message='Not applied because another adjustment failed')
+
+    return jsonify({'applied': applied, 'results': results}), 200 if applied else 400
+
+
 # /order related endpoints
 @app.route('/store/order', methods=['POST'])
 def place_order():
@@ -396,59 +957,203 @@ def place_order():
     pet_id = data['petId']
     quantity = data['quantity']
 
-    # Check if the pet is available in the inventory
-    if pet_id not in inventory or inventory[pet_id] < quantity:
+    # Reserve the quantity in the inventory, returning 400 if the pet is not available
+    try:
+        inventory.reserve(pet_id, quantity)
+    except InsufficientQuantityError:
         abort(400, 'Not enough inventory for the specified pet')
 
-    # Update inventory (for simplicity, we are not handling concurrency here)
-    inventory[pet_id] -= quantity
-
-    # Create an order (store orders in the 'orders' list)
-    order_id = len(orders) + 1
+    # Create an order (store orders in the 'orders' store)
+    order_id = orders.next_id()
     order = {
         'orderId': order_id,
         'petId': pet_id,
         'quantity': quantity,
         'status': 'placed'
     }
-    orders.append(order)
+    orders.add(order)
 
     return jsonify(order), 201
 
 
+def validate_line_item(item):
+    """
+    Check a line item of a bulk order.
+
+    Parameters:
+    - item: The line item sent by the client.
+
+    Returns:
+    - str: The error message describing why the line item is invalid, or None if it is valid.
+    """
+    if not isinstance(item, dict):
+        return 'Bad or missing data. Expected a JSON object'
+    if 'petId' not in item:
+        return 'Bad or missing data. Missing petId field'
+    if 'quantity' not in item:
+        return 'Bad or missing data. Missing quantity field'
+    if not isinstance(item['petId'], (str, int)) or isinstance(item['petId'], bool):
+        return 'Bad or missing data. PetId must be a string or an integer'
+    quantity = item['quantity']
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        return 'Bad or missing data. Quantity must be a positive integer'
+    return None
+
+
+@app.route('/store/orders/bulk', methods=['POST'])
+def place_orders_bulk():
+    """
+    Place many orders in one request.
+    POST /store/orders/bulk
+
+    Request JSON Body:
+    - A JSON array of line items, each with the same petId and quantity fields as POST /store/order.
+
+    Returns:
+    - The result of each line item, in order, with a status code of 200. A result holds the line item's index and
+      either a status of 201 with the placed order, or a status of 400 with the message POST /store/order would
+      return. Inventory for all the line items is reserved at once, so concurrent orders can never oversell.
+    - If the body isn't a JSON array, return a JSON message with a status code of 400.
+    """
+    data = request.get_json()
+    if not isinstance(data, list):
+        abort(400, 'Bad or missing data. Expected a JSON array')
+
+    results = []
+    valid_items = []
+    for index, item in enumerate(data):
+        error = validate_line_item(item)
+        if error:
+            results.append({'index': index, 'status': 400, 'message': error})
+        else:
+            results.append({'index': index, 'status': 201})
+            valid_items.append(item)
+
+    # Reserve the inventory for every line item in one critical section, then store the orders in one go
+    reserved = inventory.reserve_many([(item['petId'], item['quantity']) for item in valid_items])
+    placed_items = [item for item, is_reserved in zip(valid_items, reserved) if is_reserved]
+    new_orders = [{'orderId': order_id, 'petId': item['petId'], 'quantity': item['quantity'], 'status': 'placed'}
+                  for item, order_id in zip(placed_items, orders.next_ids(len(placed_items)))]
+    orders.add_many(new_orders)
+
+    valid_results = (result for result in results if result['status'] == 201)
+    new_order = iter(new_orders)
+    for result, is_reserved in zip(valid_results, reserved):
+        if is_reserved:
+            result['order'] = next(new_order)
+        else:
+            result.update(status=400, message='Not enough inventory for the specified pet')
+
+    return jsonify({
+        'placed': len(new_orders),
+        'failed': len(results) - len(new_orders),
+        'results': results
+    }), 200
+
+
 @app.route('/store/order/<int:order_id>', methods=['GET'])
 def get_order(order_id):
+    versioned_order = orders.get_versioned(order_id)
+
     # Check if the order exists
-    if not (1 <= order_id <= len(orders)):
+    if not versioned_order:
         return jsonify({'message': 'Order not found'}), 404
 
-    return jsonify(orders[order_id - 1])
+    order, version = versioned_order
+    return cached_response(('order', order_id), version, order)
 
 
 @app.route('/store/orders', methods=['GET'])
 def get_all_orders():
-    return jsonify(orders)
+    # Return a page of the orders if one is requested
+    page_args = get_page_args()
+    if page_args:
+        after_id, limit = page_args
+        return jsonify(page_response(orders.page(after_id, limit + 1), 'orderId', limit))
+
+    # Stream all orders, one page from the store at a time, if requested
+    stream_format = get_stream_format()
+    if stream_format:
+        return stream_response(iter_pages(orders.page, 'orderId'), stream_format)
+
+    return jsonify(list(orders))
 
 
 @app.route('/store/order/<int:order_id>', methods=['DELETE'])
 def delete_order(order_id):
+    # Delete the order
+    deleted_order = orders.delete(order_id)
+
     # Check if the order exists
-    if not (1 <= order_id <= len(orders)):
+    if not deleted_order:
         return jsonify({'message': 'Order not found'}), 404
 
-    # Delete the order
-    deleted_order = orders.pop(order_id - 1)
-
     return jsonify({'message': f'Order {order_id} deleted', 'deleted_order': deleted_order})
 
 
 # /users related endpoints
 def find_user_by_username(username):
-    return next((user for user in users if user['username'] == username), None)
+    return users.get_by_username(username)
 
 
 def find_user_by_id(user_id):
-    return next((user for user in users if user['id'] == user_id), None)
+    return users.get(user_id)
+
+
+def public_user(user):
+    """
+    Return the fields of a user that are sent to clients, leaving out the password hash.
+
+    Parameters:
+    - user (dict): The user as stored.
+
+    Returns:
+    - dict: The user without its password.
+    """
+    return {key: value for key, value in user.items() if key != 'password'}
+
+
+def get_session_token():
+    """
+    Read the session token sent in an 'Authorization: Bearer <token>' header.
+
+    Returns:
+    - str: The token, or None if the request has no bearer token.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' and token.strip() else None
+
+
+def check_session(user):
+    """
+    Check that the session token sent with the request, if any, was issued to a user. Requests without a token are
+    let through, so clients that don't log in keep working.
+
+    Parameters:
+    - user (dict): The user the request acts on.
+
+    Raises:
+    - 401 if the token is invalid, expired or revoked, or 403 if it was issued to another user.
+    """
+    token = get_session_token()
+    if token is None:
+        return
+    user_id = sessions.validate(token)
+    if user_id is None:
+        abort(401, 'Invalid or expired session token')
+    if user_id != user['id']:
+        abort(403, 'Session token belongs to another user')
+
+
+@app.errorhandler(PasswordPoolFullError)
+def password_pool_full(error):
+    """
+    Shed load when too many passwords are already waiting to be hashed or checked.
+
+    Returns:
+    - A JSON message indicating 'Too many password checks in progress' with a status code of 503 and a Retry-After header.
+    """
+    return jsonify({'message': 'Too many password checks in progress, try again later'}), 503, {'Retry-After': '1'}
 
 
 @app.route('/user', methods=['POST'])
@@ -461,21 +1166,30 @@ def create_user():
         abort(400, 'Bad or missing data. Missing email field')
     if 'password' not in data:
         abort(400, 'Bad or missing data. Missing password field')
+    if not isinstance(data['username'], str):
+        abort(400, 'Bad or missing data. Username must be a string')
+    if not isinstance(data['password'], str):
+        abort(400, 'Bad or missing data. Password must be a string')
 
     existing_user = find_user_by_username(data['username'])
     if existing_user:
         abort(400, 'Username already exists')
 
-    user_id = len(users) + 1
+    user_id = users.next_id()
     new_user = {
         'id': user_id,
         'username': data['username'],
         'email': data['email'],
-        'password': data['password']
+        'password': password_hasher.hash(data['password'])
     }
-    users.append(new_user)
 
-    return jsonify(new_user), 201
+    # Return 400 if the username was registered in the meantime
+    try:
+        users.add(new_user)
+    except DuplicateError:
+        abort(400, 'Username already exists')
+
+    return jsonify(public_user(new_user)), 201
 
 
 @app.route('/user/login', methods=['GET'])
@@ -490,18 +1204,36 @@ def login_user():
 
     user = find_user_by_username(username)
 
-    if not user or user['password'] != password:
+    # Check the password on the hashing pool, doing the same work whether or not the user exists
+    if not password_hasher.verify(password, user['password'] if user else None):
         abort(401, 'Invalid username or password')
 
-    return jsonify({'message': 'Login successful'})
+    # Later requests send the token instead of the password, so they skip the password check
+    return jsonify({'message': 'Login successful', 'token': sessions.issue(user['id']), 'expiresIn': sessions.ttl})
+
+
+@app.route('/user/logout', methods=['GET'])
+def logout_user():
+    token = get_session_token()
+
+    if not token:
+        abort(401, 'Bad or missing data. Missing session token')
+    if sessions.validate(token) is None:
+        abort(401, 'Invalid or expired session token')
+
+    sessions.revoke(token)
+
+    return jsonify({'message': 'Logout successful'})
 
 
 @app.route('/user/<username>', methods=['GET'])
 def get_user_by_username(username):
     user = find_user_by_username(username)
+    versioned_user = users.get_versioned(user['id']) if user else None
 
-    if user:
-        return jsonify(user)
+    if versioned_user:
+        user, version = versioned_user
+        return cached_response(('user', user['id']), version, public_user(user))
     else:
         return jsonify({'message': 'User not found'}), 404
 
@@ -513,26 +1245,50 @@ def update_user(username):
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
+    check_session(user)
+
     data = request.get_json()
 
     if 'email' not in data:
         abort(400, 'Bad or missing data. Missing email field')
     if 'password' not in data:
         abort(400, 'Bad or missing data. Missing password field')
+    if not isinstance(data['password'], str):
+        abort(400, 'Bad or missing data. Password must be a string')
 
-    user['email'] = data['email']
-    user['password'] = data['password']
+    user = users.update(user['id'], {'email': data['email'], 'password': password_hasher.hash(data['password'])})
 
-    return jsonify(user)
+    # Return 404 if the user was deleted in the meantime
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    return jsonify(public_user(user))
 
 
 @app.route('/user/<username>', methods=['DELETE'])
 def delete_user(username):
-    global users
-    users = [user for user in users if user['username'] != username]
+    user = find_user_by_username(username)
+
+    if user:
+        check_session(user)
+        users.delete(user['id'])
 
     return jsonify({'message': f'User {username} deleted'})
 
 
+# /metrics endpoint
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Report the metrics of the requests served by this process.
+    GET /metrics
+
+    Returns:
+    - The request counts by endpoint and status code, the bytes received and sent, and latency histograms and
+      quantiles by endpoint, in the Prometheus text exposition format.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,199 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+
+from app import app as wsgi_app, max_body_size
+
+# Request bodies up to this size are buffered in memory, larger ones spill to a temporary file
+MAX_MEMORY_BODY_SIZE = 1024 * 1024
+
+
+class PetStoreAsgi:
+    """
+    ASGI application serving the Pet Store API on an asyncio event loop.
+
+    Connections, keep-alive and request bodies are handled on the event loop, so a slow client
+    uploading a file doesn't hold a thread. Once a request body has been fully received, the Flask
+    views run on a bounded thread pool and the response is streamed back to the event loop, so
+    both apps expose the same routes and the same error messages.
+
+    Bodies are received up to the limit max_body_size returns for their endpoint, so no client can
+    fill the disk. A body whose Content-Length is already over the limit is never received, and
+    neither is the rest of one that grows past it; the view then gets a body that answers 413 when
+    read, so views that check the Content-Length first reject it as they would under gunicorn.
+    """
+
+    def __init__(self, application, threads, max_body_size):
+        self.application = application
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='petstore')
+        self._url_adapter = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        content_length = None
+        for name, value in scope['headers']:
+            if name == b'content-length' and value.isdigit():
+                content_length = int(value)
+        if content_length is not None and content_length > self._limit(scope):
+            body, size = OversizedBody(), None
+        else:
+            body, size = await self._receive_body(scope, receive, content_length)
+            if body is None:
+                return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self._run_view, loop, build_environ(scope, body, size), send)
+        finally:
+            body.close()
+
+    async def _receive_body(self, scope, receive, content_length):
+        # Receive the whole body on the event loop before any thread is involved
+        body = SpooledTemporaryFile(max_size=MAX_MEMORY_BODY_SIZE)
+        # A Content-Length within the limit bounds the body already; other bodies are checked against the limit of
+        # their endpoint once they span several messages, so most requests skip the URL match
+        limit = content_length
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None, None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            more_body = message.get('more_body', False)
+            if more_body and limit is None:
+                limit = self._limit(scope)
+            if limit is not None and size > limit:
+                body.close()
+                return OversizedBody(), None
+            body.write(chunk)
+            if not more_body:
+                break
+        body.seek(0)
+        return body, size
+
+    def _limit(self, scope):
+        # The app's routes are all registered by the time it serves its first request
+        if self._url_adapter is None:
+            self._url_adapter = self.application.url_map.bind('')
+        try:
+            endpoint, _ = self._url_adapter.match(scope['path'], scope['method'])
+        except HTTPException:
+            endpoint = None
+        return self.max_body_size(endpoint)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _run_view(self, loop, environ, send):
+        # Runs on a worker thread; every ASGI message is handed back to the event loop
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            response_start['status'] = int(status.split(' ', 1)[0])
+            response_start['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                         for name, value in headers]
+
+        response_start = {}
+        response = self.application(environ, start_response)
+        try:
+            send_message({'type': 'http.response.start', **response_start})
+            for chunk in response:
+                if chunk:
+                    send_message({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            send_message({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+
+
+class OversizedBody(io.RawIOBase):
+    """
+    Stand-in for a request body larger than its endpoint accepts, which is not received.
+    """
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        raise RequestEntityTooLarge()
+
+
+def build_environ(scope, body, content_length=None):
+    """
+    Build a WSGI environ from an ASGI HTTP scope.
+
+    Parameters:
+    - scope (dict): The ASGI connection scope.
+    - body (file): The request body.
+    - content_length (int, optional): The size of the body if it has been received, or None to keep the
+      Content-Length header of the request.
+
+    Returns:
+    - dict: The WSGI environ for the request.
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+
+    # The body ends where the client's does, so chunked bodies, which have no Content-Length, aren't read as empty
+    environ['wsgi.input_terminated'] = True
+    if content_length is not None:
+        environ['CONTENT_LENGTH'] = str(content_length)
+
+    return environ
+
+
+def create_app(threads=8):
+    """
+    Create the ASGI variant of the Pet Store API.
+
+    Parameters:
+    - threads (int): The number of threads that run views concurrently.
+
+    Returns:
+    - PetStoreAsgi: The ASGI application, sharing its stores with the WSGI app.
+    """
+    return PetStoreAsgi(wsgi_app, threads, max_body_size)
@@ -0,0 +1,215 @@
+import hashlib
+import itertools
+import os
+import tempfile
+
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+# Size of the chunks read from an upload
+CHUNK_SIZE = 64 * 1024
+
+# Largest image accepted by default
+DEFAULT_MAX_IMAGE_SIZE = 10 * 1024 * 1024
+
+# Room allowed in the Content-Length of an upload for the multipart boundaries and part headers
+MAX_MULTIPART_OVERHEAD = 16 * 1024
+
+# Leading bytes of the image formats accepted, and their content types
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+# Number of leading bytes needed to recognise any accepted format
+SNIFF_SIZE = 12
+
+
+class InvalidImageError(Exception):
+    """
+    Raised when an upload isn't in one of the accepted image formats.
+    """
+
+
+class ImageTooLargeError(Exception):
+    """
+    Raised when an image is larger than the store accepts.
+    """
+
+
+class ImageStore:
+    """
+    Content-addressed image files on disk.
+
+    Images are streamed to a temporary file while their SHA-256 hash is computed, then moved to a
+    path derived from the hash. Identical images are therefore stored once, however many pets use
+    them, and a stored file never changes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_IMAGE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest):
+        """
+        Return the path of an image file.
+
+        Parameters:
+        - digest (str): The SHA-256 hash of the image, in hex.
+
+        Returns:
+        - str: The path the image is stored at.
+        """
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def derivative_path(self, digest, size):
+        """
+        Return the path of a resized copy of an image.
+
+        Parameters:
+        - digest (str): The SHA-256 hash of the original image, in hex.
+        - size (int): The longest side of the resized copy, in pixels.
+
+        Returns:
+        - str: The path the resized copy is stored at, next to the original.
+        """
+        return f'{self.path(digest)}-{size}.webp'
+
+    def save(self, chunks):
+        """
+        Store an image, unless an identical one is already stored.
+
+        Parameters:
+        - chunks (iterable): The content of the image, as chunks of bytes.
+
+        Returns:
+        - tuple: The SHA-256 hash of the image in hex, and its size in bytes.
+
+        Raises:
+        - ImageTooLargeError: If the image is larger than max_size. Nothing is stored.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise ImageTooLargeError(size)
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            path = self.path(digest.hexdigest())
+            if os.path.exists(path):
+                os.unlink(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return digest.hexdigest(), size
+
+
+def sniff_image_type(header):
+    """
+    Identify the format of an image from its leading bytes.
+
+    Parameters:
+    - header (bytes): The first SNIFF_SIZE bytes of the image, or all of it if it is shorter.
+
+    Returns:
+    - str: The content type of the image, or None if it isn't in one of the accepted formats.
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def sniff_chunks(chunks, sniff_size=SNIFF_SIZE):
+    """
+    Identify the format of an image from its first chunks, before the rest of it is read.
+
+    Parameters:
+    - chunks (iterable): The content of the image, as chunks of bytes.
+    - sniff_size (int): The number of leading bytes to read before identifying the format.
+
+    Returns:
+    - tuple: The content type of the image, and an iterator over its whole content, including the chunks already read.
+
+    Raises:
+    - InvalidImageError: If the image isn't in one of the accepted formats. The rest of it is not read.
+    """
+    chunks = iter(chunks)
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= sniff_size:
+            break
+    header = b''.join(head)
+
+    content_type = sniff_image_type(header[:sniff_size])
+    if content_type is None:
+        raise InvalidImageError
+    return content_type, itertools.chain([header], chunks)
+
+
+def _iter_multipart_events(stream, boundary, chunk_size):
+    # Feed the body to the decoder a chunk at a time, until the end of the multipart data
+    decoder = MultipartDecoder(boundary)
+    complete = False
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            if complete:
+                raise ValueError('Unexpected end of the multipart body')
+            chunk = stream.read(chunk_size)
+            complete = not chunk
+            decoder.receive_data(chunk or None)
+        elif isinstance(event, Epilogue):
+            return
+        else:
+            yield event
+
+
+def _iter_part_data(events):
+    for event in events:
+        if isinstance(event, Data):
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+
+def open_multipart_file(stream, boundary, field_name, chunk_size=CHUNK_SIZE):
+    """
+    Find a file field in a multipart/form-data body, reading the body incrementally.
+
+    Parameters:
+    - stream (file): The binary stream holding the body.
+    - boundary (bytes): The boundary of the multipart body.
+    - field_name (str): The name of the file field.
+    - chunk_size (int): The number of bytes to read at a time.
+
+    Returns:
+    - tuple: The File event of the field, with its filename and headers, and an iterator over its content that
+      reads the rest of the body as it is consumed. None if the body has no such field.
+
+    Raises:
+    - ValueError: If the body isn't valid multipart data, possibly while iterating over the content.
+    """
+    events = _iter_multipart_events(stream, boundary, chunk_size)
+    for event in events:
+        if isinstance(event, File) and event.name == field_name:
+            return event, _iter_part_data(events)
+    return None
@@ -0,0 +1,228 @@
+import codecs
+import json
+
+# Size of the chunks read from a request body or written to a streamed response
+CHUNK_SIZE = 64 * 1024
+
+# Number of items fetched from a store at a time while streaming a response
+STREAM_PAGE_SIZE = 1000
+
+WHITESPACE = ' \t\n\r'
+
+# Yielded by iter_ndjson in place of a line that isn't valid JSON
+INVALID_LINE = object()
+
+_decoder = json.JSONDecoder()
+
+
+class _TextReader:
+    """
+    Incrementally decode a UTF-8 byte stream, keeping only the unparsed text in memory.
+    """
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        # Drop the text that has already been parsed before appending the next chunk
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer += self.decoder.decode(chunk, final=self.eof)
+
+    def peek(self):
+        # Return the next non-whitespace character, or None at the end of the stream
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return None
+            self.fill()
+
+    def advance(self):
+        self.position += 1
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.fill()
+                continue
+            # A value that ends with the buffer, or a number cut short by it, may continue in the next chunk
+            if not self.eof and (end == len(self.buffer) or
+                                 type(value) in (int, float) and self.buffer[end] not in ',]}' + WHITESPACE):
+                self.fill()
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yield the items of a JSON array read incrementally from a binary stream.
+
+    Parameters:
+    - stream (file): The binary stream holding the JSON array.
+    - chunk_size (int): The number of bytes to read at a time.
+
+    Yields:
+    - The decoded items of the array, one at a time.
+
+    Raises:
+    - ValueError: If the stream doesn't hold a valid JSON array. Items before the error have
+      already been yielded.
+    """
+    reader = _TextReader(stream, chunk_size)
+    if reader.peek() != '[':
+        raise ValueError('Expected a JSON array')
+    reader.advance()
+
+    if reader.peek() == ']':
+        reader.advance()
+    else:
+        while True:
+            yield reader.decode_value()
+            separator = reader.peek()
+            reader.advance()
+            if separator == ']':
+                break
+            if separator != ',':
+                raise ValueError('Expected , or ] in the JSON array')
+
+    if reader.peek() is not None:
+        raise ValueError('Unexpected data after the JSON array')
+
+
+def iter_ndjson(stream, chunk_size=CHUNK_SIZE, loads=json.loads):
+    """
+    Yield the lines of a newline-delimited JSON stream, read incrementally from a binary stream.
+
+    Parameters:
+    - stream (file): The binary stream holding one JSON document per line.
+    - chunk_size (int): The number of bytes to read at a time.
+    - loads (callable): The function decoding a single line, raising ValueError if it isn't valid JSON.
+
+    Yields:
+    - The decoded document of each non-blank line, or INVALID_LINE if the line isn't valid JSON.
+    """
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        lines = (pending + chunk).split(b'\n')
+        # The last line may continue in the next chunk, unless the stream has ended
+        pending = lines.pop() if chunk else b''
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield INVALID_LINE
+        if not chunk:
+            return
+
+
+def iter_pages(fetch_page, id_field, page_size=STREAM_PAGE_SIZE):
+    """
+    Yield every item of a listing, fetching one page at a time so only one page is in memory.
+
+    Parameters:
+    - fetch_page (callable): Called with the ID to list after and the page size; returns a page ordered by ID.
+    - id_field (str): The name of the ID field of the items.
+    - page_size (int): The number of items to fetch at a time.
+
+    Yields:
+    - The items of the listing, ordered by ID.
+    """
+    after_id = 0
+    while True:
+        page = fetch_page(after_id, page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1][id_field]
+
+
+def _chunks(pieces, chunk_size):
+    # Join small pieces of text into chunks of about chunk_size bytes
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def stream_json_array(items, dumps=json.dumps, chunk_size=CHUNK_SIZE):
+    """
+    Encode items as a JSON array, one chunk at a time.
+
+    Parameters:
+    - items (iterable): The items to encode.
+    - dumps (callable): The function encoding a single item to a JSON string.
+    - chunk_size (int): The approximate size of the chunks to yield.
+
+    Yields:
+    - bytes: Consecutive chunks of the JSON array.
+    """
+    def pieces():
+        yield '['
+        for index, item in enumerate(items):
+            yield ',' + dumps(item) if index else dumps(item)
+        yield ']\n'
+
+    return _chunks(pieces(), chunk_size)
+
+
+def stream_json_object(pairs, dumps=json.dumps, chunk_size=CHUNK_SIZE):
+    """
+    Encode key/value pairs as a JSON object, one chunk at a time.
+
+    Parameters:
+    - pairs (iterable): The (key, value) pairs to encode.
+    - dumps (callable): The function encoding a single key or value to a JSON string.
+    - chunk_size (int): The approximate size of the chunks to yield.
+
+    Yields:
+    - bytes: Consecutive chunks of the JSON object.
+    """
+    def pieces():
+        yield '{'
+        for index, (key, value) in enumerate(pairs):
+            yield (',' if index else '') + dumps(key) + ':' + dumps(value)
+        yield '}\n'
+
+    return _chunks(pieces(), chunk_size)
+
+
+def stream_ndjson(items, dumps=json.dumps, chunk_size=CHUNK_SIZE):
+    """
+    Encode items as newline-delimited JSON, one chunk at a time.
+
+    Parameters:
+    - items (iterable): The items to encode, one per line.
+    - dumps (callable): The function encoding a single item to a JSON string.
+    - chunk_size (int): The approximate size of the chunks to yield.
+
+    Yields:
+    - bytes: Consecutive chunks of the NDJSON stream.
+    """
+    return _chunks((dumps(item) + '\n' for item in items), chunk_size)
@@ -0,0 +1,352 @@
+import threading
+import time
+from threading import Lock
+
+# Sub-buckets per power of two in a histogram; values are recorded with an error under 1 / 2 ** (SUB_BUCKET_BITS - 1)
+SUB_BUCKET_BITS = 4
+
+# Largest value a histogram tells apart; larger values are counted in its last bucket
+MAX_HISTOGRAM_BITS = 32
+
+HISTOGRAM_BUCKETS = (MAX_HISTOGRAM_BITS - SUB_BUCKET_BITS + 2) << (SUB_BUCKET_BITS - 1)
+
+# Quantiles of the request latency exported alongside the histograms
+LATENCY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Key of the WSGI environ entry holding the endpoint a request was routed to
+ENDPOINT_KEY = 'petstore.endpoint'
+
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+_MAX_VALUE = (1 << MAX_HISTOGRAM_BITS) - 1
+
+
+def bucket_index(value):
+    """
+    Return the bucket of a log-linear histogram counting a value.
+
+    Values below 2 ** SUB_BUCKET_BITS have a bucket each; above that, each power of two is split
+    into 2 ** (SUB_BUCKET_BITS - 1) buckets of equal width, as in an HDR histogram.
+
+    Parameters:
+    - value (int): The non-negative value to count.
+
+    Returns:
+    - int: The index of the bucket.
+    """
+    if value > _MAX_VALUE:
+        value = _MAX_VALUE
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def bucket_bounds(index):
+    """
+    Return the range of values counted by a histogram bucket.
+
+    Parameters:
+    - index (int): The index of the bucket.
+
+    Returns:
+    - tuple: The lowest value of the bucket, and the lowest value of the next one.
+    """
+    if index < 2 * _HALF:
+        return index, index + 1
+    shift = index // _HALF - 1
+    sub_bucket = index - (shift << (SUB_BUCKET_BITS - 1))
+    return sub_bucket << shift, (sub_bucket + 1) << shift
+
+
+class Histogram:
+    """
+    Log-linear histogram of non-negative integers in fixed memory, in the style of HdrHistogram.
+
+    The counts are a plain list with one slot per bucket, whatever values are recorded, and
+    recording a value is an increment of one slot. A histogram is written by a single thread.
+    """
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.total = 0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        """
+        Add the counts of another histogram to this one.
+
+        Parameters:
+        - other (Histogram): The histogram to add.
+        """
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, quantile):
+        """
+        Estimate a quantile of the recorded values.
+
+        Parameters:
+        - quantile (float): The quantile, between 0 and 1.
+
+        Returns:
+        - int: The upper bound of the bucket holding the quantile, or 0 if nothing was recorded.
+        """
+        rank = quantile * self.count()
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bucket_bounds(index)[1]
+        return 0
+
+    def cumulative_powers_of_two(self):
+        """
+        Count the recorded values below each power of two, which are all bucket boundaries.
+
+        Returns:
+        - list: (bound, count) pairs for each power of two from 2 ** SUB_BUCKET_BITS on, where count is the number
+          of values below bound.
+        """
+        counts = self.counts
+        cumulative = sum(counts[:2 * _HALF])
+        pairs = [(2 * _HALF, cumulative)]
+        for start in range(2 * _HALF, HISTOGRAM_BUCKETS, _HALF):
+            cumulative += sum(counts[start:start + _HALF])
+            pairs.append((bucket_bounds(start + _HALF - 1)[1], cumulative))
+        return pairs
+
+
+class _Series:
+    """
+    Measurements of the requests to one endpoint, recorded by one thread.
+    """
+
+    __slots__ = ('latencies', 'request_bytes', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.latencies = Histogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses = {}
+
+    def merge(self, other):
+        self.latencies.merge(other.latencies)
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        for status, count in other.statuses.copy().items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+
+class Metrics:
+    """
+    Per-endpoint request metrics, recorded without locks.
+
+    Each thread records into its own series, so recording never waits for another thread or for a
+    scrape; a lock is only taken the first time a thread records. A scrape merges the series of
+    all threads, folding those of threads that have exited into a single retired series, so memory
+    stays proportional to the number of live threads and endpoints. Counts read while a thread is
+    recording may be one request behind each other.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._threads = []
+        self._retired = {}
+        self._compact_size = 64
+        self._lock = Lock()
+
+    def _new_series(self, endpoint):
+        thread_series = getattr(self._local, 'series', None)
+        if thread_series is None:
+            thread_series = self._local.series = {}
+            with self._lock:
+                self._threads.append((threading.current_thread(), thread_series))
+                if len(self._threads) >= self._compact_size:
+                    self._retire_exited_threads()
+                    self._compact_size = max(64, 2 * len(self._threads))
+        series = thread_series[endpoint] = _Series()
+        return series
+
+    def _retire_exited_threads(self):
+        # Called with the lock held
+        alive = []
+        for thread, series in self._threads:
+            if thread.is_alive():
+                alive.append((thread, series))
+                continue
+            for endpoint, thread_series in series.items():
+                self._retired.setdefault(endpoint, _Series()).merge(thread_series)
+        self._threads = alive
+
+    def record(self, endpoint, status, duration_ns, request_size, response_size):
+        """
+        Record a request.
+
+        Parameters:
+        - endpoint (str): The endpoint the request was routed to.
+        - status (int): The status code of the response.
+        - duration_ns (int): The time taken to respond, in nanoseconds.
+        - request_size (int): The size of the request body in bytes.
+        - response_size (int): The size of the response body in bytes.
+        """
+        try:
+            series = self._local.series[endpoint]
+        except (AttributeError, KeyError):
+            series = self._new_series(endpoint)
+
+        # Histogram.record, inlined as it is the hot path of every request
+        latency = duration_ns // 1000
+        shift = latency.bit_length() - SUB_BUCKET_BITS
+        histogram = series.latencies
+        if shift <= 0:
+            histogram.counts[latency] += 1
+        elif shift <= MAX_HISTOGRAM_BITS - SUB_BUCKET_BITS:
+            histogram.counts[(shift << (SUB_BUCKET_BITS - 1)) + (latency >> shift)] += 1
+        else:
+            histogram.counts[-1] += 1
+        histogram.total += latency
+
+        series.request_bytes += request_size
+        series.response_bytes += response_size
+        statuses = series.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        """
+        Merge the measurements of all threads.
+
+        Returns:
+        - dict: The merged series of each endpoint.
+        """
+        merged = {}
+        with self._lock:
+            self._retire_exited_threads()
+            sources = [self._retired] + [series for _, series in self._threads]
+            for source in sources:
+                for endpoint, series in source.copy().items():
+                    merged.setdefault(endpoint, _Series()).merge(series)
+        return merged
+
+    def render(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+        - str: The metrics of every endpoint that has served a request.
+        """
+        snapshot = sorted(self.snapshot().items())
+        lines = ['# HELP petstore_http_requests_total Requests served, by endpoint and status code.',
+                 '# TYPE petstore_http_requests_total counter']
+        for endpoint, series in snapshot:
+            for status, count in sorted(series.statuses.items()):
+                lines.append(f'petstore_http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        for name, help_text, field in (
+                ('petstore_http_request_bytes_total', 'Bytes of request bodies received, by endpoint.', 'request_bytes'),
+                ('petstore_http_response_bytes_total', 'Bytes of response bodies sent, by endpoint.', 'response_bytes')):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for endpoint, series in snapshot:
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {getattr(series, field)}')
+
+        name = 'petstore_http_request_duration_seconds'
+        lines += [f'# HELP {name} Time taken to respond, by endpoint.', f'# TYPE {name} histogram']
+        for endpoint, series in snapshot:
+            histogram = series.latencies
+            count = histogram.count()
+            for bound, cumulative in histogram.cumulative_powers_of_two():
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound * 1e-6:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.total * 1e-6:g}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {count}')
+
+        name = 'petstore_http_request_latency_seconds'
+        lines += [f'# HELP {name} Quantiles of the time taken to respond, by endpoint.', f'# TYPE {name} summary']
+        for endpoint, series in snapshot:
+            for quantile in LATENCY_QUANTILES:
+                value = series.latencies.quantile(quantile) * 1e-6
+                lines.append(f'{name}{{endpoint="{endpoint}",quantile="{quantile}"}} {value:g}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {series.latencies.total * 1e-6:g}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {series.latencies.count()}')
+        return '\n'.join(lines) + '\n'
+
+
+class _RecordingIterator:
+    """
+    Streamed response body that counts its bytes and records the request once the server closes it.
+    """
+
+    __slots__ = ('_middleware', '_response', '_environ', '_state')
+
+    def __init__(self, middleware, response, environ, state):
+        self._middleware = middleware
+        self._response = response
+        self._environ = environ
+        self._state = state
+
+    def __iter__(self):
+        state = self._state
+        state[2] = 0
+        for chunk in self._response:
+            state[2] += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._response, 'close'):
+                self._response.close()
+        finally:
+            self._middleware.finish(self._environ, self._state)
+
+
+class MetricsMiddleware:
+    """
+    WSGI middleware recording the latency, request and response sizes and status code of every request.
+
+    The endpoint of a request is read from the ENDPOINT_KEY entry of its environ, set once the
+    request is routed; requests that are never routed are recorded as 'none'. Responses with a
+    Content-Length, which Flask has finished building by the time it returns them, are recorded
+    right away and passed through untouched, so files still go out through sendfile. Streamed
+    responses are timed until the server closes them, counting their bytes on the way.
+    """
+
+    def __init__(self, application, metrics):
+        self.application = application
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        # Start time, status code, and response size from Content-Length, or None if the response is streamed
+        state = [time.perf_counter_ns(), 0, None]
+
+        def recording_start_response(status, headers, exc_info=None):
+            state[1] = int(status[:3])
+            for name, value in headers:
+                if name == 'Content-Length':
+                    state[2] = int(value)
+                    break
+            return start_response(status, headers, exc_info)
+
+        response = self.application(environ, recording_start_response)
+        if state[2] is not None:
+            self.finish(environ, state)
+            return response
+        return _RecordingIterator(self, response, environ, state)
+
+    def finish(self, environ, state):
+        """
+        Record a request whose response is complete.
+
+        Parameters:
+        - environ (dict): The WSGI environ of the request.
+        - state (list): The start time, status code and response size of the request.
+        """
+        request_size = environ.get('CONTENT_LENGTH', '')
+        self.metrics.record(environ.get(ENDPOINT_KEY) or 'none', state[1], time.perf_counter_ns() - state[0],
+                            int(request_size) if request_size.isdigit() else 0, state[2] or 0)
@@ -0,0 +1,59 @@
+import base64
+import json
+
+# Largest page size a client may request
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(last_id):
+    """
+    Build the opaque cursor that continues a listing after the given ID.
+
+    Parameters:
+    - last_id (int): The ID of the last item of the current page.
+
+    Returns:
+    - str: A URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps({'after': last_id}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Read the ID a listing continues after from an opaque cursor.
+
+    Parameters:
+    - cursor (str): A cursor built by encode_cursor().
+
+    Returns:
+    - int: The ID of the last item of the previous page.
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        after_id = data['after']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor')
+    if type(after_id) is not int:
+        raise ValueError('Invalid cursor')
+    return after_id
+
+
+def parse_limit(limit):
+    """
+    Read a page size from a query parameter.
+
+    Parameters:
+    - limit (str): The value of the limit parameter.
+
+    Returns:
+    - int: The page size.
+
+    Raises:
+    - ValueError: If the limit is not a whole number between 1 and MAX_PAGE_SIZE.
+    """
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        raise ValueError('Invalid limit')
+    return int(limit)
@@ -0,0 +1,130 @@
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+# Default cost of hashing a password: log2 of the scrypt CPU/memory cost, about 70 ms and 16 MiB per hash
+DEFAULT_PASSWORD_COST = 14
+
+# Block size of scrypt; memory use is 128 * SCRYPT_BLOCK_SIZE * 2 ** cost bytes
+SCRYPT_BLOCK_SIZE = 8
+
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+# Largest number of passwords waiting for or being hashed by the pool
+MAX_PENDING_PASSWORDS = 256
+
+
+class PasswordPoolFullError(Exception):
+    """
+    Raised when too many passwords are already waiting to be hashed.
+    """
+
+
+def _encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, cost):
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=2 ** cost, r=SCRYPT_BLOCK_SIZE, p=1,
+                          maxmem=2 * 128 * SCRYPT_BLOCK_SIZE * 2 ** cost, dklen=HASH_SIZE)
+
+
+def hash_password(password, cost=DEFAULT_PASSWORD_COST):
+    """
+    Hash a password with scrypt and a random salt.
+
+    Parameters:
+    - password (str): The password to hash.
+    - cost (int): log2 of the scrypt CPU/memory cost. Each increment doubles the time and memory a hash takes.
+
+    Returns:
+    - str: The hash, as 'scrypt$<cost>$<salt>$<hash>' with the salt and hash in base64.
+    """
+    salt = os.urandom(SALT_SIZE)
+    return f'scrypt${cost}${_encode(salt)}${_encode(_scrypt(password, salt, cost))}'
+
+
+def verify_password(password, encoded):
+    """
+    Check a password against a hash made by hash_password, at the cost the hash was made with.
+
+    Parameters:
+    - password (str): The password to check.
+    - encoded (str): The stored hash. Passwords stored in plaintext before they were hashed are compared as is.
+
+    Returns:
+    - bool: True if the password matches.
+    """
+    fields = encoded.split('$')
+    if len(fields) != 4 or fields[0] != 'scrypt':
+        return hmac.compare_digest(password.encode('utf-8'), encoded.encode('utf-8'))
+    cost, salt, expected = int(fields[1]), base64.b64decode(fields[2]), base64.b64decode(fields[3])
+    return hmac.compare_digest(_scrypt(password, salt, cost), expected)
+
+
+class PasswordHasher:
+    """
+    Bounded pool of threads hashing and verifying passwords.
+
+    Hashing is deliberately slow, so it runs on a fixed number of threads instead of the request
+    threads: however many logins arrive at once, they use at most max_workers cores and leave the
+    others to the remaining endpoints. scrypt releases the GIL, so the threads hash in parallel.
+    At most max_pending passwords are queued; beyond that, PasswordPoolFullError is raised so the
+    caller can shed load instead of queueing requests indefinitely.
+    """
+
+    def __init__(self, cost=DEFAULT_PASSWORD_COST, max_workers=2, max_pending=MAX_PENDING_PASSWORDS):
+        self.cost = cost
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='petstore-passwords')
+        self._slots = BoundedSemaphore(max_pending)
+        # Checked when the user doesn't exist, so unknown usernames take as long as wrong passwords
+        self._dummy_hash = hash_password('', cost)
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolFullError
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """
+        Hash a password on the pool, at the pool's cost.
+
+        Parameters:
+        - password (str): The password to hash.
+
+        Returns:
+        - str: The hash, as returned by hash_password.
+
+        Raises:
+        - PasswordPoolFullError: If max_pending passwords are already queued.
+        """
+        return self._run(hash_password, password, self.cost)
+
+    def verify(self, password, encoded):
+        """
+        Check a password against a stored hash on the pool.
+
+        Parameters:
+        - password (str): The password to check.
+        - encoded (str): The stored hash, or None if the user doesn't exist.
+
+        Returns:
+        - bool: True if the password matches. Always False if encoded is None, after the same work as a mismatch.
+
+        Raises:
+        - PasswordPoolFullError: If max_pending passwords are already queued.
+        """
+        if encoded is None:
+            self._run(verify_password, password, self._dummy_hash)
+            return False
+        return self._run(verify_password, password, encoded)
@@ -0,0 +1,178 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map
+
+from metrics import ENDPOINT_KEY
+
+# Number of independently locked parts of the bucket storage
+BUCKET_SHARDS = 16
+
+# Largest number of buckets kept in memory, across all shards
+MAX_BUCKETS = 100000
+
+
+class RateLimit:
+    """
+    Token bucket limit of a route: each client may send burst requests at once, then rate requests per second.
+    """
+
+    __slots__ = ('rate', 'burst', 'per')
+
+    def __init__(self, rate, burst, per='ip'):
+        self.rate = rate
+        self.burst = burst
+        # 'ip' to give each client address a bucket, or 'client' to give each authenticated user one
+        self.per = per
+
+
+def parse_rate_limits(spec):
+    """
+    Parse rate limits from a string such as 'login_user=10/20,find_pet_by_status=50/100:client'.
+
+    Parameters:
+    - spec (str): Comma-separated '<endpoint>=<rate>/<burst>' entries, optionally followed by ':ip' or ':client'.
+
+    Returns:
+    - dict: The RateLimit of each endpoint.
+
+    Raises:
+    - ValueError: If an entry is malformed.
+    """
+    limits = {}
+    for entry in filter(None, (entry.strip() for entry in spec.split(','))):
+        endpoint, _, limit = entry.partition('=')
+        limit, _, per = limit.partition(':')
+        rate, _, burst = limit.partition('/')
+        rate, burst = float(rate), float(burst or rate)
+        if not endpoint or rate <= 0 or burst < 1 or per not in ('', 'ip', 'client'):
+            raise ValueError(f'Invalid rate limit: {entry}')
+        limits[endpoint.strip()] = RateLimit(rate, burst, per or 'ip')
+    return limits
+
+
+class BucketStore:
+    """
+    Memory-bounded token buckets, split into shards that each have their own lock.
+
+    A client's bucket is found by hashing its key, so concurrent requests from different clients
+    rarely wait for the same lock. Each shard is an LRU of at most max_buckets / shards buckets;
+    evicting a bucket forgets how much of its burst the client used, which errs towards letting
+    requests through.
+    """
+
+    def __init__(self, shards=BUCKET_SHARDS, max_buckets=MAX_BUCKETS):
+        self._shards = [(OrderedDict(), Lock()) for _ in range(shards)]
+        self._max_shard_size = max(1, max_buckets // shards)
+
+    def take(self, key, limit, now=None):
+        """
+        Take a token from a client's bucket.
+
+        Parameters:
+        - key (tuple): The key of the bucket, identifying the route and the client.
+        - limit (RateLimit): The limit of the route.
+        - now (float): The current time.monotonic() value, read if not given.
+
+        Returns:
+        - float: 0 if the request is allowed, or the number of seconds until the bucket has a token again.
+        """
+        if now is None:
+            now = time.monotonic()
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [limit.burst, now]
+                if len(buckets) > self._max_shard_size:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / limit.rate
+
+    def __len__(self):
+        return sum(len(buckets) for buckets, _ in self._shards)
+
+
+class RateLimitMiddleware:
+    """
+    WSGI middleware rejecting requests beyond the rate limit of their route with 429 Too Many Requests.
+
+    On the first request, the rules of the limited endpoints are copied out of the Flask app's URL
+    map: rules without variables go into a dict keyed by method and path, and the others into a
+    small map of their own. Most requests are therefore matched with a dict lookup instead of a
+    full URL match, and requests to routes without a limit are passed straight through. Rejected
+    requests never reach Flask.
+
+    Routes limited per 'ip' get a bucket per client address. For routes limited per 'client',
+    client_key is called with the environ and returns the key of the client, such as its user ID,
+    or None to fall back to its address.
+    """
+
+    def __init__(self, application, url_map, limits, client_key, buckets=None):
+        self.application = application
+        self.url_map = url_map
+        self.limits = limits
+        self.client_key = client_key
+        self.buckets = buckets if buckets is not None else BucketStore()
+        self._routes = None
+
+    def _build_routes(self):
+        # The app's routes are all registered by the time it serves its first request
+        static = {}
+        dynamic = Map(converters=self.url_map.converters, strict_slashes=False)
+        for rule in self.url_map.iter_rules():
+            if rule.endpoint not in self.limits:
+                continue
+            if rule.arguments:
+                dynamic.add(rule.empty())
+            else:
+                for method in rule.methods:
+                    static[(method, rule.rule)] = rule.endpoint
+        return static, dynamic.bind('') if list(dynamic.iter_rules()) else None
+
+    def _endpoint(self, environ):
+        if self._routes is None:
+            self._routes = self._build_routes()
+        static, dynamic = self._routes
+        method, path = environ['REQUEST_METHOD'], environ.get('PATH_INFO', '')
+        endpoint = static.get((method, path))
+        if endpoint is not None or dynamic is None:
+            return endpoint
+        try:
+            endpoint, _ = dynamic.match(path.encode('latin-1').decode('utf-8', 'replace'), method)
+        except HTTPException:
+            return None
+        return endpoint
+
+    def __call__(self, environ, start_response):
+        if not self.limits:
+            return self.application(environ, start_response)
+        endpoint = self._endpoint(environ)
+        if endpoint is None:
+            return self.application(environ, start_response)
+        limit = self.limits[endpoint]
+
+        client = self.client_key(environ) if limit.per == 'client' else None
+        if client is None:
+            client = environ.get('REMOTE_ADDR', '')
+        retry_after = self.buckets.take((endpoint, client), limit)
+        if not retry_after:
+            return self.application(environ, start_response)
+
+        # Rejected requests never reach Flask, so tell the metrics which endpoint they were for
+        environ[ENDPOINT_KEY] = endpoint
+        body = json.dumps({'message': 'Too many requests, try again later'}).encode('utf-8')
+        start_response('429 Too Many Requests', [('Content-Type', 'application/json'),
+                                                 ('Content-Length', str(len(body))),
+                                                 ('Retry-After', str(math.ceil(retry_after)))])
+        return [body]
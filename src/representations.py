@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from threading import Lock
+
+# Number of resources whose encoded representation is kept
+MAX_CACHED_REPRESENTATIONS = 10000
+
+
+class RepresentationCache:
+    """
+    Bounded cache of the encoded representations of resources, keyed by resource and version.
+
+    Only the latest version of each resource is kept, and the least recently used resources are
+    evicted once the cache is full. Encoding happens outside the lock, so a slow encoding never
+    blocks readers of other resources.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_REPRESENTATIONS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, version, encode):
+        """
+        Return the representation of a version of a resource, encoding it on a cache miss.
+
+        Parameters:
+        - key (tuple): The key of the resource.
+        - version (int): The version of the resource to represent.
+        - encode (callable): Called without arguments to encode the resource on a cache miss.
+
+        Returns:
+        - bytes: The encoded representation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        body = encode()
+        with self._lock:
+            # Never replace a newer version that was cached while this one was being encoded
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < version:
+                self._entries[key] = (version, body)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body
+
+    def __len__(self):
+        return len(self._entries)
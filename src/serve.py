@@ -0,0 +1,87 @@
+import argparse
+import os
+
+import uvicorn
+from gunicorn.app.base import BaseApplication
+
+
+class PetStoreServer(BaseApplication):
+    """
+    Serve the Pet Store API with gunicorn instead of the Werkzeug debug server.
+
+    Requests are handled by gunicorn's threaded workers, which keep connections alive between
+    requests and don't run the reloader or debugger.
+    """
+
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line options of the server.
+
+    Parameters:
+    - argv (list, optional): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+    - argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description='Serve the Pet Store API.')
+    parser.add_argument('--asgi', action='store_true',
+                        help='Serve the ASGI variant with uvicorn instead of gunicorn.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind to.')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes.')
+    parser.add_argument('--threads', type=int, default=8, help='Number of request threads per worker.')
+    parser.add_argument('--keepalive', type=int, default=5,
+                        help='Seconds to wait for the next request on a keep-alive connection.')
+    parser.add_argument('--backlog', type=int, default=2048, help='Maximum number of pending connections.')
+    args = parser.parse_args(argv)
+
+    # The in-memory stores live in a single process, so extra worker processes would each see their
+    # own copy of the data; only a SQLite database can be shared between them
+    if args.workers != 1 and not os.environ.get('PETSTORE_DATABASE'):
+        parser.error('the in-memory store cannot be shared between worker processes; '
+                     'set PETSTORE_DATABASE or scale with --threads')
+    if args.workers != 1 and args.asgi:
+        parser.error('the ASGI server runs a single worker process; scale with --threads')
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Imported only when serving: the thumbnail workers are spawned processes, which re-run this script
+    # before their first task, and shouldn't build the app and its stores
+    from app import app
+    from asgi import create_app
+
+    if args.asgi:
+        uvicorn.run(create_app(args.threads), host=args.host, port=args.port, backlog=args.backlog,
+                    timeout_keep_alive=args.keepalive, lifespan='on')
+        return
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'keepalive': args.keepalive,
+        'backlog': args.backlog,
+    }
+    PetStoreServer(app, options).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Seconds a session token stays valid after login
+DEFAULT_SESSION_TTL = 3600
+
+# Number of validated sessions kept in memory
+MAX_CACHED_SESSIONS = 100000
+
+
+class SessionManager:
+    """
+    Signed session tokens, validated through a bounded LRU cache.
+
+    A token is '<user ID>.<expiry>.<nonce>.<signature>', signed with HMAC-SHA256, so any process
+    sharing the secret can check it without shared state. Validated tokens are cached until they
+    expire or are evicted as least recently used, so a request with a known token costs a dict
+    lookup and a lookup in the revoked session store instead of a password check.
+    """
+
+    def __init__(self, secret, revocations, ttl=DEFAULT_SESSION_TTL, max_entries=MAX_CACHED_SESSIONS):
+        self.secret = secret
+        self.revocations = revocations
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()
+        self._lock = Lock()
+
+    def _sign(self, payload):
+        digest = hmac.new(self.secret, payload.encode('utf-8'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+    def _remember(self, token, session):
+        # Called with the lock held
+        self._sessions[token] = session
+        self._sessions.move_to_end(token)
+        if len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+
+    def issue(self, user_id):
+        """
+        Issue a session token for a user.
+
+        Parameters:
+        - user_id (int): The unique identifier of the user who logged in.
+
+        Returns:
+        - str: The signed token, valid for ttl seconds.
+        """
+        expires = int(time.time()) + self.ttl
+        payload = f'{user_id}.{expires}.{secrets.token_urlsafe(12)}'
+        token = f'{payload}.{self._sign(payload)}'
+        with self._lock:
+            self._remember(token, (user_id, expires))
+        return token
+
+    def validate(self, token):
+        """
+        Check a session token.
+
+        Parameters:
+        - token (str): The token sent by the client.
+
+        Returns:
+        - int: The ID of the user the token was issued to, or None if it is forged, malformed, expired or revoked.
+        """
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is not None:
+                if session[1] <= now:
+                    del self._sessions[token]
+                    return None
+                self._sessions.move_to_end(token)
+        if session is not None:
+            # The token may have been revoked by another process since it was cached
+            return session[0] if token not in self.revocations else None
+
+        # Not cached: issued by another process, or evicted, so check the signature
+        payload, _, signature = token.rpartition('.')
+        fields = payload.split('.')
+        if len(fields) != 3 or not fields[0].isdecimal() or not fields[1].isdecimal():
+            return None
+        if not hmac.compare_digest(signature.encode('utf-8'), self._sign(payload).encode('ascii')):
+            return None
+        session = (int(fields[0]), int(fields[1]))
+        if session[1] <= now or token in self.revocations:
+            return None
+
+        with self._lock:
+            self._remember(token, session)
+        return session[0]
+
+    def revoke(self, token):
+        """
+        Revoke a session token, so no process sharing the revoked session store accepts it any more.
+
+        Parameters:
+        - token (str): The token to revoke. Must be valid.
+        """
+        expires = int(token.split('.')[1])
+        self.revocations.add(token, expires)
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,543 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from store import DuplicateError, InsufficientQuantityError, InventorySnapshot, username_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS pets_name_category ON pets (name, category);
+CREATE INDEX IF NOT EXISTS pets_status ON pets (status, id);
+CREATE TABLE IF NOT EXISTS inventory (
+    category TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    orderId INTEGER PRIMARY KEY,
+    petId,
+    quantity INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    usernameKey TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+-- Usernames are looked up and kept unique case-folded by store.username_key, which SQLite's NOCASE can't do
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_key ON users (usernameKey);
+CREATE TABLE IF NOT EXISTS pet_images (
+    petId INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    contentType TEXT NOT NULL,
+    thumbnails TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revoked_sessions (
+    token TEXT PRIMARY KEY,
+    expires INTEGER NOT NULL
+);
+-- The inventory has a single version, bumped by every row any statement changes
+INSERT OR IGNORE INTO sequences (name, value) VALUES ('inventory_version', 1);
+CREATE TRIGGER IF NOT EXISTS inventory_insert_version AFTER INSERT ON inventory BEGIN
+    UPDATE sequences SET value = value + 1 WHERE name = 'inventory_version';
+END;
+CREATE TRIGGER IF NOT EXISTS inventory_update_version AFTER UPDATE ON inventory BEGIN
+    UPDATE sequences SET value = value + 1 WHERE name = 'inventory_version';
+END;
+CREATE TRIGGER IF NOT EXISTS inventory_delete_version AFTER DELETE ON inventory BEGIN
+    UPDATE sequences SET value = value + 1 WHERE name = 'inventory_version';
+END;
+"""
+
+# The columns of the pets and users returned by the stores, leaving out their version and username key
+PET_COLUMNS = 'id, name, category, status'
+USER_COLUMNS = 'id, username, email, password'
+
+
+class _Rollback(Exception):
+    """
+    Raised inside a transaction to roll it back without reporting an error.
+    """
+
+
+class Database:
+    """
+    SQLite database shared by the SQLite-backed stores.
+
+    Each thread of each process gets its own connection, opened on first use, so threads never
+    share a connection and forked worker processes never inherit one. The database runs in WAL
+    mode, so readers are never blocked by a writer and several processes can serve the same data.
+    Statements are parameterized and reuse the per-connection prepared statement cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        """
+        Return the calling thread's connection, opening it if needed.
+
+        Returns:
+        - sqlite3.Connection: A connection in autocommit mode.
+        """
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False, cached_statements=256)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextmanager
+    def transaction(self, mode='IMMEDIATE'):
+        """
+        Run a block of statements in a transaction that is committed on success.
+
+        Parameters:
+        - mode (str): 'IMMEDIATE' for a write transaction, or 'DEFERRED' to read a consistent state without
+          taking the write lock.
+
+        Yields:
+        - sqlite3.Connection: The calling thread's connection.
+        """
+        connection = self.connection()
+        connection.execute(f'BEGIN {mode}')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def next_ids(self, sequence, count=1):
+        """
+        Allocate a block of IDs from a sequence. IDs are unique across all processes using the database.
+
+        Parameters:
+        - sequence (str): The name of the sequence.
+        - count (int): The number of IDs to allocate.
+
+        Returns:
+        - range: The new unique IDs.
+        """
+        # RETURNING statements only complete, and so commit, once all their rows are fetched
+        rows = self.connection().execute(
+            'INSERT INTO sequences (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value RETURNING value',
+            (sequence, count)
+        ).fetchall()
+        return range(rows[0][0] - count + 1, rows[0][0] + 1)
+
+
+class SqlitePetStore:
+    """
+    Pet storage in a SQLite table, with the same interface as store.PetStore.
+
+    The table is indexed on id, on (name, category) as a unique index that rejects duplicates, and
+    on (status, id) for status queries.
+    """
+
+    def __init__(self, database):
+        self._db = database
+
+    def next_id(self):
+        return self._db.next_ids('pets')[0]
+
+    def next_ids(self, count):
+        return list(self._db.next_ids('pets', count))
+
+    def add(self, pet):
+        try:
+            self._db.connection().execute(
+                'INSERT INTO pets (id, name, category, status) VALUES (?, ?, ?, ?)',
+                (pet['id'], pet['name'], pet['category'], pet['status'])
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicateError((pet['name'], pet['category']))
+
+    def add_many(self, pets):
+        added = []
+        with self._db.transaction() as connection:
+            for pet in pets:
+                # A failed insert only rolls back its own statement, not the transaction
+                try:
+                    connection.execute(
+                        'INSERT INTO pets (id, name, category, status) VALUES (?, ?, ?, ?)',
+                        (pet['id'], pet['name'], pet['category'], pet['status'])
+                    )
+                    added.append(True)
+                except sqlite3.IntegrityError:
+                    added.append(False)
+        return added
+
+    def get(self, pet_id):
+        row = self._db.connection().execute(f'SELECT {PET_COLUMNS} FROM pets WHERE id = ?', (pet_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_versioned(self, pet_id):
+        row = self._db.connection().execute(
+            f'SELECT {PET_COLUMNS}, version FROM pets WHERE id = ?', (pet_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        pet = dict(row)
+        return pet, pet.pop('version')
+
+    def find_by_status(self, status, after_id=0, limit=None):
+        # A negative LIMIT means no limit
+        rows = self._db.connection().execute(
+            f'SELECT {PET_COLUMNS} FROM pets WHERE status = ? AND id > ? ORDER BY id LIMIT ?',
+            (status, after_id, -1 if limit is None else limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def update(self, pet_id, changes):
+        try:
+            with self._db.transaction() as connection:
+                row = connection.execute(f'SELECT {PET_COLUMNS} FROM pets WHERE id = ?', (pet_id,)).fetchone()
+                if row is None:
+                    return None
+                old_pet = dict(row)
+                new_pet = {**old_pet, **changes}
+                connection.execute(
+                    'UPDATE pets SET name = ?, category = ?, status = ?, version = version + 1 WHERE id = ?',
+                    (new_pet['name'], new_pet['category'], new_pet['status'], pet_id)
+                )
+        except sqlite3.IntegrityError:
+            raise DuplicateError((changes.get('name'), changes.get('category')))
+        return old_pet, new_pet
+
+    def delete(self, pet_id):
+        rows = self._db.connection().execute(
+            f'DELETE FROM pets WHERE id = ? RETURNING {PET_COLUMNS}', (pet_id,)
+        ).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def __iter__(self):
+        rows = self._db.connection().execute(f'SELECT {PET_COLUMNS} FROM pets ORDER BY id').fetchall()
+        return (dict(row) for row in rows)
+
+    def __len__(self):
+        return self._db.connection().execute('SELECT COUNT(*) FROM pets').fetchone()[0]
+
+
+class SqliteInventory:
+    """
+    Inventory in a SQLite table, with the same interface as store.Inventory.
+
+    Each read-modify-write runs as a single statement or in a write transaction, so concurrent
+    requests in any process can never oversell. The latest snapshot read is kept and reused until
+    the inventory's version changes.
+    """
+
+    def __init__(self, database):
+        self._db = database
+        self._snapshot = InventorySnapshot({}, 0)
+
+    def increment(self, category):
+        self._db.connection().execute(
+            'INSERT INTO inventory (category, quantity) VALUES (?, 1) '
+            'ON CONFLICT (category) DO UPDATE SET quantity = quantity + 1',
+            (category,)
+        )
+
+    def increment_many(self, counts):
+        with self._db.transaction() as connection:
+            connection.executemany(
+                'INSERT INTO inventory (category, quantity) VALUES (?, ?) '
+                'ON CONFLICT (category) DO UPDATE SET quantity = quantity + excluded.quantity',
+                counts.items()
+            )
+
+    def decrement(self, category):
+        with self._db.transaction() as connection:
+            connection.execute('DELETE FROM inventory WHERE category = ? AND quantity = 1', (category,))
+            connection.execute('UPDATE inventory SET quantity = quantity - 1 WHERE category = ? AND quantity > 1',
+                               (category,))
+
+    def add(self, category, quantity):
+        _add_quantity(self._db.connection(), category, quantity)
+
+    def remove(self, category, quantity):
+        with self._db.transaction() as connection:
+            _remove_quantity(connection, category, quantity)
+
+    def apply(self, adjustments):
+        errors = []
+        try:
+            with self._db.transaction() as connection:
+                for operation, category, quantity in adjustments:
+                    # A failed adjustment changes nothing, so the following ones see the same state as in memory
+                    try:
+                        if operation == 'add':
+                            _add_quantity(connection, category, quantity)
+                        else:
+                            _remove_quantity(connection, category, quantity)
+                        errors.append(None)
+                    except (KeyError, InsufficientQuantityError) as error:
+                        errors.append(error)
+                if any(error is not None for error in errors):
+                    raise _Rollback()
+        except _Rollback:
+            pass
+        return errors
+
+    def reserve(self, category, quantity):
+        cursor = self._db.connection().execute(
+            'UPDATE inventory SET quantity = quantity - ? WHERE category = ? AND quantity >= ?',
+            (quantity, category, quantity)
+        )
+        if cursor.rowcount == 0:
+            raise InsufficientQuantityError(category)
+
+    def reserve_many(self, reservations):
+        reserved = []
+        with self._db.transaction() as connection:
+            for category, quantity in reservations:
+                cursor = connection.execute(
+                    'UPDATE inventory SET quantity = quantity - ? WHERE category = ? AND quantity >= ?',
+                    (quantity, category, quantity)
+                )
+                reserved.append(cursor.rowcount == 1)
+        return reserved
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot.version == self.version():
+            return snapshot
+        with self._db.transaction('DEFERRED') as connection:
+            version = connection.execute("SELECT value FROM sequences WHERE name = 'inventory_version'").fetchone()[0]
+            rows = connection.execute('SELECT category, quantity FROM inventory ORDER BY rowid').fetchall()
+        snapshot = InventorySnapshot({row[0]: row[1] for row in rows}, version)
+        self._snapshot = snapshot
+        return snapshot
+
+    def version(self):
+        return self._db.connection().execute(
+            "SELECT value FROM sequences WHERE name = 'inventory_version'"
+        ).fetchone()[0]
+
+
+def _add_quantity(connection, category, quantity):
+    cursor = connection.execute('UPDATE inventory SET quantity = quantity + ? WHERE category = ?', (quantity, category))
+    if cursor.rowcount == 0:
+        raise KeyError(category)
+
+
+def _remove_quantity(connection, category, quantity):
+    row = connection.execute('SELECT quantity FROM inventory WHERE category = ?', (category,)).fetchone()
+    if row is None:
+        raise KeyError(category)
+    if row[0] < quantity:
+        raise InsufficientQuantityError(category)
+    if row[0] == quantity:
+        connection.execute('DELETE FROM inventory WHERE category = ?', (category,))
+    else:
+        connection.execute('UPDATE inventory SET quantity = ? WHERE category = ?', (row[0] - quantity, category))
+
+
+class SqliteOrderStore:
+    """
+    Order storage in a SQLite table, with the same interface as store.OrderStore.
+    """
+
+    def __init__(self, database):
+        self._db = database
+
+    def next_id(self):
+        return self._db.next_ids('orders')[0]
+
+    def next_ids(self, count):
+        return list(self._db.next_ids('orders', count))
+
+    def add(self, order):
+        self._db.connection().execute(
+            'INSERT INTO orders (orderId, petId, quantity, status) VALUES (?, ?, ?, ?)',
+            (order['orderId'], order['petId'], order['quantity'], order['status'])
+        )
+
+    def add_many(self, orders):
+        with self._db.transaction() as connection:
+            connection.executemany(
+                'INSERT INTO orders (orderId, petId, quantity, status) VALUES (?, ?, ?, ?)',
+                [(order['orderId'], order['petId'], order['quantity'], order['status']) for order in orders]
+            )
+
+    def get(self, order_id):
+        row = self._db.connection().execute('SELECT * FROM orders WHERE orderId = ?', (order_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_versioned(self, order_id):
+        # Orders never change once placed, so every order is at its first version
+        order = self.get(order_id)
+        return (order, 1) if order is not None else None
+
+    def delete(self, order_id):
+        rows = self._db.connection().execute('DELETE FROM orders WHERE orderId = ? RETURNING *', (order_id,)).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def page(self, after_id=0, limit=None):
+        # A negative LIMIT means no limit
+        rows = self._db.connection().execute(
+            'SELECT * FROM orders WHERE orderId > ? ORDER BY orderId LIMIT ?',
+            (after_id, -1 if limit is None else limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.page())
+
+    def __len__(self):
+        return self._db.connection().execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+
+class SqliteUserStore:
+    """
+    User storage in a SQLite table, with the same interface as store.UserStore.
+    """
+
+    def __init__(self, database):
+        self._db = database
+
+    def next_id(self):
+        return self._db.next_ids('users')[0]
+
+    def add(self, user):
+        try:
+            self._db.connection().execute(
+                'INSERT INTO users (id, username, usernameKey, email, password) VALUES (?, ?, ?, ?, ?)',
+                (user['id'], user['username'], username_key(user['username']), user['email'], user['password'])
+            )
+        except sqlite3.IntegrityError:
+            raise DuplicateError(user['username'])
+
+    def get(self, user_id):
+        row = self._db.connection().execute(f'SELECT {USER_COLUMNS} FROM users WHERE id = ?', (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_by_username(self, username):
+        row = self._db.connection().execute(
+            f'SELECT {USER_COLUMNS} FROM users WHERE usernameKey = ?', (username_key(username),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_versioned(self, user_id):
+        row = self._db.connection().execute(
+            f'SELECT {USER_COLUMNS}, version FROM users WHERE id = ?', (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = dict(row)
+        return user, user.pop('version')
+
+    def update(self, user_id, changes):
+        with self._db.transaction() as connection:
+            row = connection.execute(f'SELECT {USER_COLUMNS} FROM users WHERE id = ?', (user_id,)).fetchone()
+            if row is None:
+                return None
+            user = {**dict(row), **changes}
+            try:
+                connection.execute('UPDATE users SET username = ?, usernameKey = ?, email = ?, password = ?, '
+                                   'version = version + 1 WHERE id = ?',
+                                   (user['username'], username_key(user['username']), user['email'],
+                                    user['password'], user_id))
+            except sqlite3.IntegrityError:
+                raise DuplicateError(user['username'])
+        return user
+
+    def delete(self, user_id):
+        rows = self._db.connection().execute(
+            f'DELETE FROM users WHERE id = ? RETURNING {USER_COLUMNS}', (user_id,)
+        ).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def __iter__(self):
+        rows = self._db.connection().execute(f'SELECT {USER_COLUMNS} FROM users ORDER BY id').fetchall()
+        return (dict(row) for row in rows)
+
+    def __len__(self):
+        return self._db.connection().execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+
+class SqlitePetImageStore:
+    """
+    Record of the image of each pet in a SQLite table, with the same interface as store.PetImageStore.
+    """
+
+    def __init__(self, database):
+        self._db = database
+
+    def set(self, pet_id, image):
+        self._db.connection().execute(
+            'INSERT OR REPLACE INTO pet_images (petId, digest, size, contentType, thumbnails) VALUES (?, ?, ?, ?, ?)',
+            (pet_id, image['digest'], image['size'], image['contentType'], image['thumbnails'])
+        )
+
+    def set_thumbnails(self, pet_id, digest, status):
+        self._db.connection().execute(
+            'UPDATE pet_images SET thumbnails = ? WHERE petId = ? AND digest = ?', (status, pet_id, digest)
+        )
+
+    def get(self, pet_id):
+        row = self._db.connection().execute(
+            'SELECT digest, size, contentType, thumbnails FROM pet_images WHERE petId = ?', (pet_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, pet_id):
+        self._db.connection().execute('DELETE FROM pet_images WHERE petId = ?', (pet_id,))
+
+
+class SqliteRevokedSessionStore:
+    """
+    Revoked session tokens in a SQLite table, with the same interface as store.RevokedSessionStore, so a token
+    revoked by one worker is rejected by all of them.
+    """
+
+    def __init__(self, database):
+        self._db = database
+
+    def add(self, token, expires):
+        with self._db.transaction() as connection:
+            connection.execute('DELETE FROM revoked_sessions WHERE expires <= ?', (int(time.time()),))
+            connection.execute('INSERT OR REPLACE INTO revoked_sessions (token, expires) VALUES (?, ?)',
+                               (token, expires))
+
+    def __contains__(self, token):
+        return self._db.connection().execute(
+            'SELECT 1 FROM revoked_sessions WHERE token = ?', (token,)
+        ).fetchone() is not None
+
+
+def open_stores(path):
+    """
+    Open the SQLite-backed stores, creating the database if needed.
+
+    Parameters:
+    - path (str): The path of the SQLite database file.
+
+    Returns:
+    - tuple: The pet store, inventory, order store, user store, pet image store and revoked session store.
+    """
+    database = Database(path)
+    return (SqlitePetStore(database), SqliteInventory(database), SqliteOrderStore(database),
+            SqliteUserStore(database), SqlitePetImageStore(database), SqliteRevokedSessionStore(database))
@@ -0,0 +1,958 @@
+import time
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from threading import Lock
+
+# Number of IDs a chunk of a SortedIds holds before it is split in two halves of this size
+SORTED_IDS_CHUNK_SIZE = 1024
+
+
+class DuplicateError(Exception):
+    """
+    Raised when a write would break a uniqueness constraint of a store.
+    """
+
+
+class InsufficientQuantityError(Exception):
+    """
+    Raised when an inventory entry does not hold enough quantity for a removal.
+    """
+
+
+def username_key(username):
+    """
+    Return the key a username is indexed by, so usernames differing only in case are the same user.
+
+    Parameters:
+    - username (str): The username.
+
+    Returns:
+    - str: The case-folded username.
+    """
+    return username.casefold()
+
+
+class IdSequence:
+    """
+    Monotonic ID allocator.
+
+    IDs are handed out by an itertools.count, whose next() is atomic under the GIL, so allocation
+    needs no lock and two requests can never receive the same ID.
+    """
+
+    def __init__(self, start=1):
+        self._counter = count(start)
+
+    def next(self):
+        """
+        Allocate the next ID.
+
+        Returns:
+        - int: An ID greater than every ID previously allocated by this sequence.
+        """
+        return next(self._counter)
+
+    def take(self, count):
+        """
+        Allocate several IDs at once.
+
+        Parameters:
+        - count (int): The number of IDs to allocate.
+
+        Returns:
+        - list: The allocated IDs, in increasing order.
+        """
+        return [next(self._counter) for _ in range(count)]
+
+
+class SortedIds:
+    """
+    Set of IDs kept in increasing order, split into sorted chunks of bounded size.
+
+    A single sorted list moves every ID after the one added or removed, which costs time in
+    proportion to the number of IDs. Here only the IDs of one chunk are moved, so adding and
+    removing an ID takes about the same time with a million IDs as with a thousand. Chunks are
+    split when they grow past twice SORTED_IDS_CHUNK_SIZE and merged with a neighbour when they
+    shrink below half of it. Not thread-safe; the stores use it under their lock.
+    """
+
+    __slots__ = ('_chunks', '_maxes', '_size')
+
+    def __init__(self):
+        self._chunks = []
+        # Highest ID of each chunk, to find the chunk an ID belongs in
+        self._maxes = []
+        self._size = 0
+
+    def add(self, item):
+        """
+        Add an ID that isn't in the set.
+
+        Parameters:
+        - item (int): The ID to add.
+        """
+        self._size += 1
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            return
+        index = bisect_left(self._maxes, item)
+        if index == len(self._maxes):
+            # New IDs are usually the highest, so this is usually an append
+            index -= 1
+            self._chunks[index].append(item)
+            self._maxes[index] = item
+        else:
+            insort(self._chunks[index], item)
+        if len(self._chunks[index]) > 2 * SORTED_IDS_CHUNK_SIZE:
+            self._split(index)
+
+    def remove(self, item):
+        """
+        Remove an ID from the set.
+
+        Parameters:
+        - item (int): The ID to remove.
+
+        Raises:
+        - KeyError: If the ID isn't in the set.
+        """
+        index = bisect_left(self._maxes, item)
+        chunk = self._chunks[index] if index < len(self._chunks) else []
+        position = bisect_left(chunk, item)
+        if position == len(chunk) or chunk[position] != item:
+            raise KeyError(item)
+        del chunk[position]
+        self._size -= 1
+        if not chunk:
+            del self._chunks[index]
+            del self._maxes[index]
+            return
+        self._maxes[index] = chunk[-1]
+        if len(chunk) < SORTED_IDS_CHUNK_SIZE // 2 and len(self._chunks) > 1:
+            # Merge with the next chunk, or the previous one for the last chunk
+            index = min(index, len(self._chunks) - 2)
+            self._chunks[index:index + 2] = [self._chunks[index] + self._chunks[index + 1]]
+            self._maxes[index:index + 2] = [self._maxes[index + 1]]
+            if len(self._chunks[index]) > 2 * SORTED_IDS_CHUNK_SIZE:
+                self._split(index)
+
+    def _split(self, index):
+        chunk = self._chunks[index]
+        self._chunks[index:index + 1] = [chunk[:SORTED_IDS_CHUNK_SIZE], chunk[SORTED_IDS_CHUNK_SIZE:]]
+        self._maxes[index:index + 1] = [chunk[SORTED_IDS_CHUNK_SIZE - 1], chunk[-1]]
+
+    def after(self, after_id=0, limit=None):
+        """
+        Return the IDs above a given one.
+
+        Parameters:
+        - after_id (int, optional): Only return IDs higher than this one.
+        - limit (int, optional): The maximum number of IDs to return. Defaults to all of them.
+
+        Returns:
+        - list: The IDs, in increasing order.
+        """
+        index = bisect_right(self._maxes, after_id)
+        if index == len(self._chunks):
+            return []
+        chunk = self._chunks[index]
+        ids = chunk[bisect_right(chunk, after_id):]
+        for chunk in self._chunks[index + 1:]:
+            if limit is not None and len(ids) >= limit:
+                break
+            ids += chunk
+        return ids if limit is None else ids[:limit]
+
+    def __len__(self):
+        return self._size
+
+
+class PetStore:
+    """
+    In-memory pet storage indexed by pet ID.
+
+    Pets are kept in a dict keyed by their ID, so lookups, inserts and deletes take constant time
+    regardless of how many pets are stored. Iteration yields pets in insertion order.
+
+    A secondary index keyed on (name, category) makes duplicate detection a single dict probe, and
+    a per-status index of sorted pet IDs lets status queries cost the size of the result.
+
+    Writes hold the store's lock so the indexes always change together. Stored pets are never
+    mutated; an update replaces the pet with a new dict, so readers can use a pet they retrieved
+    without locking.
+
+    Each pet has a version that starts at 1 and is bumped by every update. Writers store the pet
+    before its version and readers read the version before the pet, so a pet read without the lock
+    is never older than the version read with it.
+    """
+
+    def __init__(self):
+        self._pets = {}
+        self._versions = {}
+        self._by_name_category = {}
+        self._by_status = {}
+        self._ids = IdSequence()
+        self._lock = Lock()
+
+    def next_id(self):
+        """
+        Allocate the ID for the next pet.
+
+        Returns:
+        - int: A new unique ID. IDs of deleted pets are never reused.
+        """
+        return self._ids.next()
+
+    def next_ids(self, count):
+        """
+        Allocate the IDs for several new pets.
+
+        Parameters:
+        - count (int): The number of IDs to allocate.
+
+        Returns:
+        - list: New unique IDs, in increasing order.
+        """
+        return self._ids.take(count)
+
+    def add(self, pet):
+        """
+        Add a pet to the store.
+
+        Parameters:
+        - pet (dict): The pet to add. Must contain an 'id' allocated by next_id().
+
+        Raises:
+        - DuplicateError: If a pet with the same name and category already exists.
+        """
+        key = (pet['name'], pet['category'])
+        with self._lock:
+            if key in self._by_name_category:
+                raise DuplicateError(key)
+            self._pets[pet['id']] = pet
+            self._versions[pet['id']] = 1
+            self._by_name_category[key] = pet['id']
+            self._index_status(pet['status'], pet['id'])
+
+    def add_many(self, pets):
+        """
+        Add several pets to the store in one go, skipping duplicates.
+
+        Parameters:
+        - pets (list): The pets to add. Each must contain an 'id' allocated by next_ids().
+
+        Returns:
+        - list: For each pet, True if it was added or False if it was a duplicate.
+        """
+        added = []
+        with self._lock:
+            for pet in pets:
+                key = (pet['name'], pet['category'])
+                if key in self._by_name_category:
+                    added.append(False)
+                    continue
+                self._pets[pet['id']] = pet
+                self._versions[pet['id']] = 1
+                self._by_name_category[key] = pet['id']
+                self._index_status(pet['status'], pet['id'])
+                added.append(True)
+        return added
+
+    def get(self, pet_id):
+        """
+        Retrieve a pet by ID.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+
+        Returns:
+        - dict: The pet, or None if no pet has the given ID.
+        """
+        return self._pets.get(pet_id)
+
+    def get_versioned(self, pet_id):
+        """
+        Retrieve a pet by ID along with its version.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+
+        Returns:
+        - tuple: The pet and its version, or None if no pet has the given ID.
+        """
+        version = self._versions.get(pet_id)
+        pet = self._pets.get(pet_id)
+        return (pet, version) if pet is not None and version is not None else None
+
+    def find_by_status(self, status, after_id=0, limit=None):
+        """
+        Retrieve the pets with the given status.
+
+        Parameters:
+        - status (str): The status to look for.
+        - after_id (int, optional): Only return pets with a higher ID than this one.
+        - limit (int, optional): The maximum number of pets to return. Defaults to all of them.
+
+        Returns:
+        - list: The matching pets, ordered by ID.
+        """
+        with self._lock:
+            pet_ids = self._by_status.get(status)
+            if pet_ids is None:
+                return []
+            return [self._pets[pet_id] for pet_id in pet_ids.after(after_id, limit)]
+
+    def update(self, pet_id, changes):
+        """
+        Apply changes to a pet and keep the secondary indexes up to date.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet to update.
+        - changes (dict): The fields to update and their new values.
+
+        Returns:
+        - tuple: The pet before and after the update, or None if no pet has the given ID.
+
+        Raises:
+        - DuplicateError: If another pet already has the resulting name and category.
+        """
+        with self._lock:
+            old_pet = self._pets.get(pet_id)
+            if old_pet is None:
+                return None
+
+            new_pet = {**old_pet, **changes}
+            old_key = (old_pet['name'], old_pet['category'])
+            new_key = (new_pet['name'], new_pet['category'])
+            if new_key != old_key:
+                if new_key in self._by_name_category:
+                    raise DuplicateError(new_key)
+                del self._by_name_category[old_key]
+                self._by_name_category[new_key] = pet_id
+            if new_pet['status'] != old_pet['status']:
+                self._unindex_status(old_pet['status'], pet_id)
+                self._index_status(new_pet['status'], pet_id)
+            self._pets[pet_id] = new_pet
+            self._versions[pet_id] += 1
+
+        return old_pet, new_pet
+
+    def delete(self, pet_id):
+        """
+        Remove a pet by ID.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet to remove.
+
+        Returns:
+        - dict: The removed pet, or None if no pet has the given ID.
+        """
+        with self._lock:
+            pet = self._pets.pop(pet_id, None)
+            if pet is not None:
+                del self._versions[pet_id]
+                del self._by_name_category[(pet['name'], pet['category'])]
+                self._unindex_status(pet['status'], pet_id)
+        return pet
+
+    def _index_status(self, status, pet_id):
+        pet_ids = self._by_status.get(status)
+        if pet_ids is None:
+            pet_ids = self._by_status[status] = SortedIds()
+        pet_ids.add(pet_id)
+
+    def _unindex_status(self, status, pet_id):
+        pet_ids = self._by_status[status]
+        pet_ids.remove(pet_id)
+        if not pet_ids:
+            del self._by_status[status]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._pets.values()))
+
+    def __len__(self):
+        return len(self._pets)
+
+
+class InventorySnapshot:
+    """
+    Immutable state of the inventory at one version.
+
+    The quantities of a published snapshot are never modified, so readers can use them without
+    locking or copying.
+    """
+
+    __slots__ = ('quantities', 'version', '_body')
+
+    def __init__(self, quantities, version):
+        self.quantities = quantities
+        self.version = version
+        self._body = None
+
+    def encoded(self, encode):
+        """
+        Return the encoded quantities, encoding them only on the first call.
+
+        Parameters:
+        - encode (callable): Called with the quantities to encode them.
+
+        Returns:
+        - The encoded quantities.
+        """
+        # Concurrent first calls may both encode, which only wastes the work of one of them
+        if self._body is None:
+            self._body = encode(self.quantities)
+        return self._body
+
+
+class Inventory:
+    """
+    In-memory inventory of quantities by category.
+
+    The inventory is copy-on-write: every change copies the current quantities under the
+    inventory's lock, so concurrent requests can never oversell or drive a quantity negative, and
+    then publishes them as a new InventorySnapshot with the next version. Readers just take the
+    current snapshot, without locking, and always see a consistent state.
+    """
+
+    def __init__(self):
+        self._snapshot = InventorySnapshot({}, 1)
+        self._lock = Lock()
+
+    def _publish(self, quantities):
+        # Called with the lock held; replacing the snapshot is a single atomic assignment
+        self._snapshot = InventorySnapshot(quantities, self._snapshot.version + 1)
+
+    def increment(self, category):
+        """
+        Add one to a category, creating it if it doesn't exist.
+
+        Parameters:
+        - category (str): The category to increment.
+        """
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            quantities[category] = quantities.get(category, 0) + 1
+            self._publish(quantities)
+
+    def increment_many(self, counts):
+        """
+        Add to several categories at once, creating the ones that don't exist.
+
+        Parameters:
+        - counts (dict): The quantity to add to each category.
+        """
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            for category, quantity in counts.items():
+                quantities[category] = quantities.get(category, 0) + quantity
+            self._publish(quantities)
+
+    def decrement(self, category):
+        """
+        Take one from a category if it holds any, removing the category once it reaches zero.
+
+        Parameters:
+        - category (str): The category to decrement.
+        """
+        with self._lock:
+            quantity = self._snapshot.quantities.get(category, 0)
+            if quantity == 0:
+                return
+            quantities = dict(self._snapshot.quantities)
+            if quantity > 1:
+                quantities[category] = quantity - 1
+            else:
+                del quantities[category]
+            self._publish(quantities)
+
+    def add(self, category, quantity):
+        """
+        Add a quantity to an existing category.
+
+        Parameters:
+        - category (str): The category to add to.
+        - quantity (int): The quantity to add.
+
+        Raises:
+        - KeyError: If the category is not in the inventory.
+        """
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            _add_quantity(quantities, category, quantity)
+            self._publish(quantities)
+
+    def remove(self, category, quantity):
+        """
+        Remove a quantity from an existing category, removing the category once it reaches zero.
+
+        Parameters:
+        - category (str): The category to remove from.
+        - quantity (int): The quantity to remove.
+
+        Raises:
+        - KeyError: If the category is not in the inventory.
+        - InsufficientQuantityError: If the category holds less than the quantity.
+        """
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            _remove_quantity(quantities, category, quantity)
+            self._publish(quantities)
+
+    def apply(self, adjustments):
+        """
+        Apply several adds and removes atomically: either all of them or none.
+
+        Parameters:
+        - adjustments (list): The (operation, category, quantity) tuples to apply in order, where operation is
+          'add' or 'remove' and behaves like add() or remove().
+
+        Returns:
+        - list: For each adjustment, None if it applies, or the KeyError or InsufficientQuantityError it raises.
+          The inventory is only changed if every adjustment applies.
+        """
+        errors = []
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            for operation, category, quantity in adjustments:
+                try:
+                    if operation == 'add':
+                        _add_quantity(quantities, category, quantity)
+                    else:
+                        _remove_quantity(quantities, category, quantity)
+                    errors.append(None)
+                except (KeyError, InsufficientQuantityError) as error:
+                    errors.append(error)
+            if all(error is None for error in errors):
+                self._publish(quantities)
+        return errors
+
+    def reserve(self, category, quantity):
+        """
+        Take a quantity from a category for an order. The category is kept even when it reaches zero.
+
+        Parameters:
+        - category (str): The category to reserve from.
+        - quantity (int): The quantity to reserve.
+
+        Raises:
+        - InsufficientQuantityError: If the category is missing or holds less than the quantity.
+        """
+        with self._lock:
+            available = self._snapshot.quantities.get(category)
+            if available is None or available < quantity:
+                raise InsufficientQuantityError(category)
+            quantities = dict(self._snapshot.quantities)
+            quantities[category] = available - quantity
+            self._publish(quantities)
+
+    def reserve_many(self, reservations):
+        """
+        Take quantities from several categories for orders, in one critical section.
+
+        Parameters:
+        - reservations (list): The (category, quantity) pairs to reserve, in order. Each behaves like reserve().
+
+        Returns:
+        - list: For each reservation, True if it was made or False if the category didn't hold enough.
+        """
+        reserved = []
+        with self._lock:
+            quantities = dict(self._snapshot.quantities)
+            for category, quantity in reservations:
+                available = quantities.get(category)
+                if available is None or available < quantity:
+                    reserved.append(False)
+                    continue
+                quantities[category] = available - quantity
+                reserved.append(True)
+            if any(reserved):
+                self._publish(quantities)
+        return reserved
+
+    def current(self):
+        """
+        Return the current snapshot of the inventory.
+
+        Returns:
+        - InventorySnapshot: The latest published snapshot. Its quantities must not be modified.
+        """
+        return self._snapshot
+
+    def version(self):
+        """
+        Return the current version of the inventory.
+
+        Returns:
+        - int: A number that grows with every change to the inventory.
+        """
+        return self._snapshot.version
+
+
+def _add_quantity(quantities, category, quantity):
+    quantities[category] = quantities[category] + quantity
+
+
+def _remove_quantity(quantities, category, quantity):
+    available = quantities[category]
+    if available < quantity:
+        raise InsufficientQuantityError(category)
+    if available == quantity:
+        del quantities[category]
+    else:
+        quantities[category] = available - quantity
+
+
+class UserStore:
+    """
+    In-memory user storage indexed by user ID and username.
+
+    Users are kept in a dict keyed by their ID, so lookups and deletes take constant time and
+    remove the user in place instead of rebuilding the collection. A second dict maps each
+    case-folded username to its user ID, so lookups by username take constant time too and
+    usernames differing only in case can't be registered twice. Like pets, users have a version
+    that every update bumps.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._versions = {}
+        self._by_username = {}
+        self._ids = IdSequence()
+        self._lock = Lock()
+
+    def next_id(self):
+        """
+        Allocate the ID for the next user.
+
+        Returns:
+        - int: A new unique ID. IDs of deleted users are never reused.
+        """
+        return self._ids.next()
+
+    def add(self, user):
+        """
+        Add a user to the store.
+
+        Parameters:
+        - user (dict): The user to add. Must contain an 'id' allocated by next_id().
+
+        Raises:
+        - DuplicateError: If a user with the same username, ignoring case, already exists.
+        """
+        key = username_key(user['username'])
+        with self._lock:
+            if key in self._by_username:
+                raise DuplicateError(user['username'])
+            self._users[user['id']] = user
+            self._versions[user['id']] = 1
+            self._by_username[key] = user['id']
+
+    def get(self, user_id):
+        """
+        Retrieve a user by ID.
+
+        Parameters:
+        - user_id (int): The unique identifier of the user.
+
+        Returns:
+        - dict: The user, or None if no user has the given ID.
+        """
+        return self._users.get(user_id)
+
+    def get_by_username(self, username):
+        """
+        Retrieve a user by username, ignoring case.
+
+        Parameters:
+        - username (str): The username of the user.
+
+        Returns:
+        - dict: The user, or None if no user has the given username.
+        """
+        user_id = self._by_username.get(username_key(username))
+        return self._users.get(user_id) if user_id is not None else None
+
+    def get_versioned(self, user_id):
+        """
+        Retrieve a user by ID along with its version.
+
+        Parameters:
+        - user_id (int): The unique identifier of the user.
+
+        Returns:
+        - tuple: The user and its version, or None if no user has the given ID.
+        """
+        version = self._versions.get(user_id)
+        user = self._users.get(user_id)
+        return (user, version) if user is not None and version is not None else None
+
+    def update(self, user_id, changes):
+        """
+        Apply changes to a user.
+
+        Parameters:
+        - user_id (int): The unique identifier of the user to update.
+        - changes (dict): The fields to update and their new values.
+
+        Returns:
+        - dict: The updated user, or None if no user has the given ID.
+
+        Raises:
+        - DuplicateError: If the new username, ignoring case, belongs to another user.
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None
+            old_key, new_key = username_key(user['username']), username_key(changes.get('username', user['username']))
+            if new_key != old_key and new_key in self._by_username:
+                raise DuplicateError(changes['username'])
+            user = {**user, **changes}
+            self._users[user_id] = user
+            self._versions[user_id] += 1
+            if new_key != old_key:
+                del self._by_username[old_key]
+                self._by_username[new_key] = user_id
+        return user
+
+    def delete(self, user_id):
+        """
+        Remove a user by ID.
+
+        Parameters:
+        - user_id (int): The unique identifier of the user to remove.
+
+        Returns:
+        - dict: The removed user, or None if no user has the given ID.
+        """
+        with self._lock:
+            self._versions.pop(user_id, None)
+            user = self._users.pop(user_id, None)
+            if user is not None:
+                del self._by_username[username_key(user['username'])]
+            return user
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._users.values()))
+
+    def __len__(self):
+        return len(self._users)
+
+
+class OrderStore:
+    """
+    In-memory order storage indexed by order ID.
+
+    Orders are kept in a dict keyed by their ID, so an order keeps its ID after other orders are
+    deleted and lookups and deletes take constant time. The order IDs are also kept in a SortedIds,
+    so a page of orders is found without walking the orders before it.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._sorted_ids = SortedIds()
+        self._ids = IdSequence()
+        self._lock = Lock()
+
+    def next_id(self):
+        """
+        Allocate the ID for the next order.
+
+        Returns:
+        - int: A new unique ID. IDs of deleted orders are never reused.
+        """
+        return self._ids.next()
+
+    def next_ids(self, count):
+        """
+        Allocate the IDs for several new orders.
+
+        Parameters:
+        - count (int): The number of IDs to allocate.
+
+        Returns:
+        - list: New unique IDs, in increasing order.
+        """
+        return self._ids.take(count)
+
+    def add(self, order):
+        """
+        Add an order to the store.
+
+        Parameters:
+        - order (dict): The order to add. Must contain an 'orderId' allocated by next_id().
+        """
+        with self._lock:
+            self._orders[order['orderId']] = order
+            self._sorted_ids.add(order['orderId'])
+
+    def add_many(self, orders):
+        """
+        Add several orders to the store in one go.
+
+        Parameters:
+        - orders (list): The orders to add. Each must contain an 'orderId' allocated by next_ids().
+        """
+        with self._lock:
+            for order in orders:
+                self._orders[order['orderId']] = order
+                self._sorted_ids.add(order['orderId'])
+
+    def get(self, order_id):
+        """
+        Retrieve an order by ID.
+
+        Parameters:
+        - order_id (int): The unique identifier of the order.
+
+        Returns:
+        - dict: The order, or None if no order has the given ID.
+        """
+        return self._orders.get(order_id)
+
+    def get_versioned(self, order_id):
+        """
+        Retrieve an order by ID along with its version.
+
+        Parameters:
+        - order_id (int): The unique identifier of the order.
+
+        Returns:
+        - tuple: The order and its version, or None if no order has the given ID.
+        """
+        # Orders never change once placed, so every order is at its first version
+        order = self._orders.get(order_id)
+        return (order, 1) if order is not None else None
+
+    def delete(self, order_id):
+        """
+        Remove an order by ID.
+
+        Parameters:
+        - order_id (int): The unique identifier of the order to remove.
+
+        Returns:
+        - dict: The removed order, or None if no order has the given ID.
+        """
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is not None:
+                self._sorted_ids.remove(order_id)
+        return order
+
+    def page(self, after_id=0, limit=None):
+        """
+        Retrieve a page of orders.
+
+        Parameters:
+        - after_id (int, optional): Only return orders with a higher ID than this one.
+        - limit (int, optional): The maximum number of orders to return. Defaults to all of them.
+
+        Returns:
+        - list: The orders, ordered by ID.
+        """
+        with self._lock:
+            return [self._orders[order_id] for order_id in self._sorted_ids.after(after_id, limit)]
+
+    def __iter__(self):
+        return iter(self.page())
+
+    def __len__(self):
+        return len(self._orders)
+
+
+class PetImageStore:
+    """
+    In-memory record of the image of each pet, indexed by pet ID.
+
+    The image files themselves are stored on disk by images.ImageStore; a record holds the content
+    hash identifying the file, its size, its content type and the status of its resized copies.
+    """
+
+    def __init__(self):
+        self._images = {}
+        self._lock = Lock()
+
+    def set(self, pet_id, image):
+        """
+        Set the image of a pet, replacing any previous one.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+        - image (dict): The image record.
+        """
+        with self._lock:
+            self._images[pet_id] = image
+
+    def set_thumbnails(self, pet_id, digest, status):
+        """
+        Set the status of the resized copies of a pet's image, unless the pet has a different image by now.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+        - digest (str): The digest of the image the status is for.
+        - status (str): The new status.
+        """
+        with self._lock:
+            image = self._images.get(pet_id)
+            if image is not None and image['digest'] == digest:
+                self._images[pet_id] = {**image, 'thumbnails': status}
+
+    def get(self, pet_id):
+        """
+        Retrieve the image of a pet.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+
+        Returns:
+        - dict: The image record, or None if the pet has no image.
+        """
+        return self._images.get(pet_id)
+
+    def delete(self, pet_id):
+        """
+        Forget the image of a pet. The image file is kept, as other pets may share it.
+
+        Parameters:
+        - pet_id (int): The unique identifier of the pet.
+        """
+        with self._lock:
+            self._images.pop(pet_id, None)
+
+
+class RevokedSessionStore:
+    """
+    In-memory set of revoked session tokens.
+
+    A token is kept until it would have expired anyway, so the set only holds the tokens revoked
+    within the last session lifetime. Expired tokens are dropped whenever the set has doubled in
+    size since they were last dropped, so revoking takes amortized constant time.
+    """
+
+    def __init__(self):
+        self._expiries = {}
+        self._prune_size = 1024
+        self._lock = Lock()
+
+    def add(self, token, expires):
+        """
+        Revoke a session token.
+
+        Parameters:
+        - token (str): The token to revoke.
+        - expires (int): The time the token expires at, in seconds since the epoch.
+        """
+        now = time.time()
+        with self._lock:
+            self._expiries[token] = expires
+            if len(self._expiries) >= self._prune_size:
+                self._expiries = {token: expiry for token, expiry in self._expiries.items() if expiry > now}
+                self._prune_size = max(1024, 2 * len(self._expiries))
+
+    def __contains__(self, token):
+        return token in self._expiries
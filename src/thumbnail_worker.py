@@ -0,0 +1,41 @@
+import os
+import signal
+import tempfile
+
+
+def initialize():
+    """
+    Prepare a worker process of the thumbnail pool.
+
+    Pillow and its image plugins are loaded once, before the first image arrives, and Ctrl-C is
+    left to the server, which shuts the pool down.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from PIL import Image
+    Image.init()
+
+
+def make_derivatives(source_path, targets):
+    """
+    Write resized WebP copies of an image. Runs in a worker process.
+
+    Parameters:
+    - source_path (str): The path of the original image.
+    - targets (list): The (size, path) pairs of the derivatives to write, where size is the longest side in pixels.
+    """
+    # Imported here so only the worker processes load Pillow
+    from PIL import Image
+
+    with Image.open(source_path) as image:
+        image.load()
+        for size, path in targets:
+            derivative = image.copy()
+            derivative.thumbnail((size, size))
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.derivative-')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    derivative.save(file, format='WEBP', quality=80)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
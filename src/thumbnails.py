@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from thumbnail_worker import initialize, make_derivatives
+
+# Longest side, in pixels, of the derivatives generated for every uploaded image
+DERIVATIVE_SIZES = (128, 512)
+
+# Largest number of images waiting for or being processed by the pool
+MAX_PENDING_IMAGES = 64
+
+
+class ThumbnailPool:
+    """
+    Bounded pool of worker processes generating the derivatives of uploaded images.
+
+    Resizing runs outside the server process, so upload latency doesn't depend on image processing
+    and a burst of uploads can't starve request threads of the GIL. The pool is started on first
+    use in each process, with the spawn start method so forked server workers never fork threads.
+    The worker processes run thumbnail_worker, which only loads Pillow, not the app and its stores.
+    At most MAX_PENDING_IMAGES images are queued; beyond that, uploads are accepted without
+    derivatives.
+    """
+
+    def __init__(self, images, max_workers=2, max_pending=MAX_PENDING_IMAGES):
+        self.images = images
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._lock = Lock()
+
+    def _get_executor(self):
+        # Called with the lock held
+        if self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=initialize)
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, digest, on_done):
+        """
+        Queue the generation of the derivatives of an image.
+
+        Parameters:
+        - digest (str): The SHA-256 hash of the stored image.
+        - on_done (callable): Called with True once the derivatives are ready, or False if they failed. Called
+          right away if the derivatives of an identical image already exist, and from a pool thread otherwise.
+
+        Returns:
+        - bool: True if the derivatives are ready or queued, or False if the queue is full.
+        """
+        targets = [(size, self.images.derivative_path(digest, size)) for size in DERIVATIVE_SIZES]
+        if all(os.path.exists(path) for _, path in targets):
+            on_done(True)
+            return True
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            future = self._get_executor().submit(make_derivatives, self.images.path(digest), targets)
+        future.add_done_callback(lambda future: self._finish(future, on_done))
+        return True
+
+    def _finish(self, future, on_done):
+        with self._lock:
+            self._pending -= 1
+        on_done(not future.cancelled() and future.exception() is None)
@@ -1,14 +1,23 @@
+import json
 from test.api.basic_requests import get, post
 
 
-def get_inventory():
+def get_inventory(stream: str = None, etag: str = None):
     """
     Test the functionality of retrieving the inventory from the Pet Store by category.
 
+    Parameters:
+    - stream (str): (optional) 'json' to stream the inventory as a JSON object, or 'ndjson' as one category per line.
+    - etag (str): (optional) The ETag of a version of the inventory already held, sent as If-None-Match.
+
     Returns:
     - The JSON response and HTTP status code from the GET request.
     """
-    return get("/store/inventory")
+    if stream == "ndjson":
+        return get("/store/inventory", {"Accept": "application/x-ndjson"})
+    if stream == "json":
+        return get("/store/inventory?stream=true")
+    return get("/store/inventory", {"If-None-Match": etag} if etag else None)
 
 
 def add_to_inventory(category: str, quantity: int):
@@ -45,3 +54,16 @@ def remove_from_inventory(category: str, quantity: int):
         "quantity": quantity
     }
     return post("/store/inventory/remove", payload)
+
+
+def adjust_inventory_batch(adjustments: list):
+    """
+    Test the functionality of adding to and removing from many inventory categories in one atomic request.
+
+    Parameters:
+    - adjustments (list): The adjustments, each with an operation of 'add' or 'remove', a category and a quantity.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+    return post("/store/inventory/batch", data=json.dumps(adjustments), headers={"Content-Type": "application/json"})
@@ -0,0 +1,11 @@
+from test.api.basic_requests import get
+
+
+def get_metrics():
+    """
+    Test the functionality of retrieving the request metrics of the Pet Store.
+
+    Returns:
+    - The metrics in the Prometheus text format and HTTP status code from the GET request.
+    """
+    return get("/metrics")
@@ -0,0 +1,83 @@
+import json
+from test.api.basic_requests import post, get, delete
+
+
+def place_order(pet_id, quantity: int):
+    """
+    Test the functionality of placing an order in the Pet Store.
+
+    Parameters:
+    - pet_id: The inventory entry to order from.
+    - quantity (int): The quantity to order.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+    payload = {
+        "petId": pet_id,
+        "quantity": quantity
+    }
+    return post("/store/order", payload)
+
+
+def place_orders_bulk(line_items: list):
+    """
+    Test the functionality of placing many orders in one request.
+
+    Parameters:
+    - line_items (list): The line items to order, each with a petId and a quantity.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+    return post("/store/orders/bulk", data=json.dumps(line_items), headers={"Content-Type": "application/json"})
+
+
+def get_order(order_id: int):
+    """
+    Test the functionality of retrieving an order by ID.
+
+    Parameters:
+    - order_id (int): The unique identifier of the order to retrieve.
+
+    Returns:
+    - The JSON response and HTTP status code from the GET request.
+    """
+    return get(f"/store/order/{order_id}")
+
+
+def get_all_orders(limit: int = None, cursor: str = None, stream: str = None):
+    """
+    Test the functionality of retrieving all orders, or a page of them.
+
+    Parameters:
+    - limit (int): (optional) The page size.
+    - cursor (str): (optional) The cursor of the page to retrieve.
+    - stream (str): (optional) 'json' to stream the orders as a JSON array, or 'ndjson' as one order per line.
+
+    Returns:
+    - The JSON response and HTTP status code from the GET request.
+    """
+    params = []
+    if limit is not None:
+        params.append(f"limit={limit}")
+    if cursor is not None:
+        params.append(f"cursor={cursor}")
+    if stream == "json":
+        params.append("stream=true")
+    headers = {"Accept": "application/x-ndjson"} if stream == "ndjson" else None
+    query = "?" + "&".join(params) if params else ""
+    return get(f"/store/orders{query}", headers)
+
+
+def delete_order(order_id: int):
+    """
+    Test the functionality of deleting an order by ID.
+
+    Parameters:
+    - order_id (int): The unique identifier of the order to delete.
+
+    Returns:
+    - The JSON response and HTTP status code from the DELETE request.
+    """
+    return delete(f"/store/order/{order_id}")
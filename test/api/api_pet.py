@@ -26,12 +26,64 @@ def add_pet(name: str = None, category: str = None, status: str = None):
     return post("/pet", payload, {"content-type": "application/json"})
 
 
-def get_pet(pet_id):
+def add_pets_bulk(pets: list, stream: str = None):
+    """
+    Test the functionality of adding many pets to the Pet Store with a JSON array.
+
+    Parameters:
+    - pets (list): The pets to be added.
+    - stream (str): (optional) 'json' to get the results as a bare JSON array, or 'ndjson' as one result per line.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+
+    endpoint = "/pet/bulk?stream=true" if stream == "json" else "/pet/bulk"
+    headers = {"content-type": "application/json"}
+    if stream == "ndjson":
+        headers["Accept"] = "application/x-ndjson"
+    return post(endpoint, pets, headers)
+
+
+def add_pets_bulk_raw(body: str):
+    """
+    Test the functionality of adding many pets to the Pet Store with a raw JSON body, which may not be valid JSON.
+
+    Parameters:
+    - body (str): The body of the request.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+
+    return post("/pet/bulk", headers={"content-type": "application/json"}, data=body)
+
+
+def add_pets_bulk_ndjson(lines: list, chunked: bool = False):
+    """
+    Test the functionality of adding many pets to the Pet Store with newline-delimited JSON.
+
+    Parameters:
+    - lines (list): The lines of the body, one pet per line.
+    - chunked (bool): (optional) Send the body with chunked transfer encoding, one line per chunk, instead of with a Content-Length.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+
+    data = "\n".join(lines) + "\n"
+    if chunked:
+        data = (f"{line}\n".encode("utf-8") for line in lines)
+    return post("/pet/bulk", headers={"content-type": "application/x-ndjson"}, data=data)
+
+
+def get_pet(pet_id, etag: str = None):
     """
     Test the functionality of retrieving a pet from the Pet Store by ID.
 
     Parameters:
     - pet_id (int): The unique identifier of the pet to retrieve.
+    - etag (str): (optional) The ETag of a version of the pet already held, sent as If-None-Match.
 
     Returns:
     - If the pet is found, return a tuple containing the JSON response and the HTTP status code with a status code of 200.
@@ -39,7 +91,7 @@ def get_pet(pet_id):
     - If there is an error during the request, return a tuple containing the error message and the HTTP status code received in the response.
     """
 
-    return get(f"/pet/{pet_id}")
+    return get(f"/pet/{pet_id}", {"If-None-Match": etag} if etag else None)
 
 
 def update_pet(pet_id, name: str = None, category: str = None, status: str = None):
@@ -85,18 +137,29 @@ def delete_pet(pet_id):
     return delete(f"/pet/{pet_id}")
 
 
-def find_pet_by_status(status: str):
+def find_pet_by_status(status: str, limit: int = None, cursor: str = None, stream: str = None):
     """
     Test the functionality of finding pets by status in the Pet Store.
 
     Parameters:
     - status (str): The status of the pets to retrieve. Should be one of 'available', 'pending', or 'sold'.
+    - limit (int): (optional) The page size.
+    - cursor (str): (optional) The cursor of the page to retrieve.
+    - stream (str): (optional) 'json' to stream the pets as a JSON array, or 'ndjson' as one pet per line.
 
     Returns:
     - The JSON response and HTTP status code from the GET request.
     """
 
-    return get(f"/pet/findByStatus?status={status}")
+    query = f"?status={status}"
+    if limit is not None:
+        query += f"&limit={limit}"
+    if cursor is not None:
+        query += f"&cursor={cursor}"
+    if stream == "json":
+        query += "&stream=true"
+    headers = {"Accept": "application/x-ndjson"} if stream == "ndjson" else None
+    return get(f"/pet/findByStatus{query}", headers)
 
 
 def upload_image(pet_id: int, file_path: str):
@@ -111,8 +174,24 @@ def upload_image(pet_id: int, file_path: str):
     - The JSON response and HTTP status code from the POST request.
     """
 
+    # Let requests set the multipart/form-data content type, which must include the boundary
     with open(file_path, 'rb') as file:
         files = {'file': file}
-        headers = {"content-type": "multipart/form-data"}
-        response = post(f"/pet/{pet_id}/uploadImage", files=files, headers=headers)
+        response = post(f"/pet/{pet_id}/uploadImage", files=files)
     return response
+
+
+def get_pet_image(pet_id: int, headers: dict = None, size: int = None):
+    """
+    Test the functionality of downloading the image of a pet in the Pet Store by ID.
+
+    Parameters:
+    - pet_id (int): The unique identifier of the pet whose image to download.
+    - headers (dict): (optional) The headers to include in the request, such as Range or If-None-Match.
+    - size (int): (optional) The size of the resized copy to download.
+
+    Returns:
+    - The response and HTTP status code from the GET request.
+    """
+    query = f"?size={size}" if size is not None else ""
+    return get(f"/pet/{pet_id}/image{query}", headers)
@@ -0,0 +1,109 @@
+from test.api.basic_requests import post, get, put, delete
+
+
+def create_user(username: str = None, email: str = None, password: str = None):
+    """
+    Test the functionality of creating a new user.
+
+    Parameters:
+    - username (str): Username of the user to be created.
+    - email (str): Email of the user to be created.
+    - password (str): Password of the user to be created.
+
+    Returns:
+    - The JSON response and HTTP status code from the POST request.
+    """
+
+    payload = {}
+    if username is not None:
+        payload["username"] = username
+    if email is not None:
+        payload["email"] = email
+    if password is not None:
+        payload["password"] = password
+
+    return post("/user", payload, {"content-type": "application/json"})
+
+
+def login_user(username: str, password: str):
+    """
+    Test the functionality of logging in a user.
+
+    Parameters:
+    - username (str): Username of the user to log in.
+    - password (str): Password of the user to log in.
+
+    Returns:
+    - The JSON response and HTTP status code from the GET request.
+    """
+
+    return get(f"/user/login?username={username}&password={password}")
+
+
+def logout_user(token: str = None):
+    """
+    Test the functionality of logging out a user.
+
+    Parameters:
+    - token (str): (optional) The session token returned by the login, sent as a bearer token.
+
+    Returns:
+    - The JSON response and HTTP status code from the GET request.
+    """
+
+    return get("/user/logout", {"Authorization": f"Bearer {token}"} if token is not None else None)
+
+
+def get_user(username: str):
+    """
+    Test the functionality of retrieving a user by username.
+
+    Parameters:
+    - username (str): Username of the user to retrieve.
+
+    Returns:
+    - The JSON response and HTTP status code from the GET request.
+    """
+
+    return get(f"/user/{username}")
+
+
+def update_user(username: str, email: str = None, password: str = None, token: str = None):
+    """
+    Test the functionality of updating a user by username.
+
+    Parameters:
+    - username (str): Username of the user to update.
+    - email (str): (optional) New email of the user.
+    - password (str): (optional) New password of the user.
+    - token (str): (optional) A session token returned by the login, sent as a bearer token.
+
+    Returns:
+    - The JSON response and HTTP status code from the PUT request.
+    """
+
+    payload = {}
+    if email is not None:
+        payload["email"] = email
+    if password is not None:
+        payload["password"] = password
+
+    headers = {"content-type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+
+    return put(f"/user/{username}", payload, headers)
+
+
+def delete_user(username: str):
+    """
+    Test the functionality of deleting a user by username.
+
+    Parameters:
+    - username (str): Username of the user to delete.
+
+    Returns:
+    - The JSON response and HTTP status code from the DELETE request.
+    """
+
+    return delete(f"/user/{username}")
@@ -4,7 +4,7 @@ from test.helpers.utils import api_logger
 from datetime import datetime
 
 
-def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict = None):
+def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict = None, data=None):
     """
     Sends a POST request to the specified endpoint with the given payload and headers.
 
@@ -13,6 +13,7 @@ def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict
         payload (dict): (optional) The data to be sent in the body of the request.
         headers (dict): (optional) The headers to include in the request.
         files (dict): (optional) The files to include in the request.
+        data: (optional) A raw body (str, bytes or iterable of chunks) to send instead of a JSON payload.
 
     Returns:
         response: The response object returned by the requests library.
@@ -22,7 +23,9 @@ def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict
     url = f"{config['base_url']}{endpoint}"
 
     # Decide whether to include json or data in the request
-    if payload and not files:
+    if data is not None:
+        response = requests.post(url, data=data, headers=headers)
+    elif payload and not files:
         response = requests.post(url, json=payload, headers=headers)
     elif files:
         response = requests.post(url, files=files, headers=headers, data=payload)
@@ -34,21 +37,22 @@ def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict
     return response
 
 
-def get(endpoint: str):
+def get(endpoint: str, headers: dict = None):
     """
     Sends a GET request to the specified endpoint.
 
     Args:
         endpoint (str): The API endpoint to send the request to.
+        headers (dict): (optional) The headers to include in the request.
 
     Returns:
         response: The response object returned by the requests library.
     """
     start_time = datetime.now()
     config = load_config()
-    response = requests.get(f"{config['base_url']}"+endpoint)
+    response = requests.get(f"{config['base_url']}"+endpoint, headers=headers)
     end_time = datetime.now()
-    api_logger(endpoint, {}, {}, response.text, "GET", start_time, end_time)
+    api_logger(endpoint, {}, headers or {}, response.text, "GET", start_time, end_time)
     return response
 
 
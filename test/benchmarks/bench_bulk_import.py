@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from app import app  # noqa: E402
+
+
+def build_body(size: int, ndjson: bool):
+    """
+    Build a bulk import body holding the given number of new pets.
+
+    Parameters:
+    - size (int): The number of pets.
+    - ndjson (bool): Whether to build newline-delimited JSON instead of a JSON array.
+
+    Returns:
+    - bytes: The request body.
+    """
+    prefix = 'NdjsonPet' if ndjson else 'ArrayPet'
+    pets = [{'name': f'{prefix}{size}-{index}', 'category': f'Category{index % 50}', 'status': 'available'}
+            for index in range(size)]
+    if ndjson:
+        return ''.join(json.dumps(pet) + '\n' for pet in pets).encode()
+    return json.dumps(pets).encode()
+
+
+def bench_bulk_import(size: int, ndjson: bool):
+    """
+    Measure how long POST /pet/bulk takes to import the given number of pets.
+
+    Parameters:
+    - size (int): The number of pets to import.
+    - ndjson (bool): Whether to send newline-delimited JSON instead of a JSON array.
+
+    Returns:
+    - float: The import time in seconds.
+    """
+    body = build_body(size, ndjson)
+    content_type = 'application/x-ndjson' if ndjson else 'application/json'
+    client = app.test_client()
+    start = time.perf_counter()
+    # Buffered, so the streamed results are part of the measured time
+    response = client.post('/pet/bulk', data=body, content_type=content_type, buffered=True)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200
+    assert response.get_json()['added'] == size
+    return elapsed
+
+
+if __name__ == '__main__':
+    for size in (10000, 100000, 1000000):
+        for ndjson in (False, True):
+            elapsed = bench_bulk_import(size, ndjson)
+            print(f"{size:>8} pets as {'NDJSON' if ndjson else 'JSON array'}: {elapsed:6.2f} s")
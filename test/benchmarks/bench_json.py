@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import jsonprovider  # noqa: E402
+from app import app, inventory, pets  # noqa: E402
+
+# Number of times each measurement is repeated; the fastest is reported, as the others were slowed by the machine
+ROUNDS = 5
+
+
+def bench_requests(path: str, requests: int, change):
+    """
+    Measure the CPU time each GET request to a path takes, in-process.
+
+    Responses are cached until the resource changes, so the resource is changed before each request to make
+    every response go through the JSON encoder. The time the changes take is measured apart and left out.
+
+    Parameters:
+    - path (str): The path to request.
+    - requests (int): The number of requests to send.
+    - change (callable): Called with the request number to change the resource before each request.
+
+    Returns:
+    - float: The CPU time per request in microseconds.
+    """
+    client = app.test_client()
+    start = time.process_time()
+    for index in range(requests):
+        change(index)
+    changes = time.process_time() - start
+
+    start = time.process_time()
+    for index in range(requests):
+        change(index)
+        response = client.get(path)
+    elapsed = time.process_time() - start - changes
+    assert response.status_code == 200
+    return elapsed / requests * 1e6
+
+
+def bench_encode(value, encodes: int):
+    """
+    Measure the CPU time the app's JSON provider takes to encode a value.
+
+    Parameters:
+    - value: The value to encode.
+    - encodes (int): The number of times to encode it.
+
+    Returns:
+    - float: The CPU time per encoding in microseconds.
+    """
+    start = time.process_time()
+    for _ in range(encodes):
+        app.json.response(value)
+    return (time.process_time() - start) / encodes * 1e6
+
+
+if __name__ == '__main__':
+    client = app.test_client()
+    pet_id = client.post('/pet', json={'name': 'BenchPet', 'category': 'Category0', 'status': 'available'}).json['id']
+    inventory.increment_many({f'Category{index}': index + 1 for index in range(1, 1000)})
+    quantities = inventory.current().quantities
+
+    def change_pet(index):
+        pets.update(pet_id, {'status': ('available', 'pending')[index % 2]})
+
+    def change_inventory(index):
+        inventory.increment_many({'Category1': 1})
+
+    providers = [('stdlib json', DefaultJSONProvider(app))]
+    if jsonprovider.orjson is not None:
+        providers.append(('orjson', jsonprovider.FastJSONProvider(app)))
+    else:
+        print('orjson is not installed; only the standard library provider is measured')
+
+    for name, provider in providers:
+        app.json = provider
+        print(f'{name}:')
+        pet_time = min(bench_requests(f'/pet/{pet_id}', 4000, change_pet) for _ in range(ROUNDS))
+        inventory_time = min(bench_requests('/store/inventory', 1000, change_inventory) for _ in range(ROUNDS))
+        encode_time = min(bench_encode(quantities, 1000) for _ in range(ROUNDS))
+        print(f'  {f"GET /pet/{pet_id}":<24}{pet_time:7.1f} us/request')
+        print(f'  {"GET /store/inventory":<24}{inventory_time:7.1f} us/request ({len(quantities)} categories)')
+        print(f'  {"encode inventory only":<24}{encode_time:7.1f} us')
@@ -0,0 +1,75 @@
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+# Measure the login itself, not the rate limit on it
+os.environ['PETSTORE_RATE_LIMITS'] = ''
+
+import app as petstore  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+
+# Costs to measure, as log2 of the scrypt CPU/memory cost
+COSTS = (12, 13, 14, 15)
+
+# Number of concurrent clients logging in
+CLIENTS = 8
+
+
+def bench_logins(cost: int, logins: int, pet_id: int):
+    """
+    Measure login throughput at a password cost, and the latency of GET /pet/<id> while the logins run.
+
+    Parameters:
+    - cost (int): The password cost to hash and verify with.
+    - logins (int): The number of logins to send.
+    - pet_id (int): The pet to request while the logins run.
+
+    Returns:
+    - tuple: The logins per second, and the median and worst GET /pet/<id> latency in milliseconds.
+    """
+    petstore.password_hasher = PasswordHasher(cost, int(os.environ.get('PETSTORE_PASSWORD_WORKERS', 2)))
+    username = f'bench_{cost}'
+    petstore.app.test_client().post('/user', json={'username': username, 'email': 'bench@example.com',
+                                                   'password': 'secret'})
+
+    def login(_):
+        response = petstore.app.test_client().get(f'/user/login?username={username}&password=secret')
+        assert response.status_code == 200
+
+    latencies = []
+    done = threading.Event()
+
+    def get_pet():
+        client = petstore.app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get(f'/pet/{pet_id}')
+            latencies.append((time.perf_counter() - start) * 1e3)
+            time.sleep(0.001)
+
+    reader = threading.Thread(target=get_pet)
+    reader.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(CLIENTS) as clients:
+        list(clients.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    reader.join()
+    return logins / elapsed, statistics.median(latencies), max(latencies)
+
+
+if __name__ == '__main__':
+    client = petstore.app.test_client()
+    pet_id = client.post('/pet', json={'name': 'BenchPet', 'category': 'Category0', 'status': 'available'}).json['id']
+
+    print(f'{CLIENTS} concurrent clients, {os.environ.get("PETSTORE_PASSWORD_WORKERS", 2)} hashing threads, '
+          f'{os.cpu_count()} CPUs')
+    for cost in COSTS:
+        throughput, median, worst = bench_logins(cost, max(8, 2 ** (18 - cost)), pet_id)
+        print(f'  cost {cost} ({2 ** cost * 128 * 8 // 2 ** 20:>3} MiB): {throughput:7.1f} logins/s, '
+              f'GET /pet/{pet_id} median {median:5.2f} ms, worst {worst:6.2f} ms')
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+from metrics import ENDPOINT_KEY, Metrics, MetricsMiddleware  # noqa: E402
+
+
+def empty_app(environ, start_response):
+    environ[ENDPOINT_KEY] = 'get_pet'
+    start_response('200 OK', [('Content-Length', '2')])
+    return [b'{}']
+
+
+def bench_record(metrics: Metrics, records: int):
+    """
+    Measure the CPU time Metrics.record takes.
+
+    Parameters:
+    - metrics (Metrics): The metrics to record into.
+    - records (int): The number of requests to record.
+
+    Returns:
+    - float: The CPU time per record in microseconds.
+    """
+    start = time.process_time()
+    for index in range(records):
+        metrics.record('get_pet', 200, 150000 + index % 100000, 0, 128)
+    return (time.process_time() - start) / records * 1e6
+
+
+def bench_middleware(application, requests: int):
+    """
+    Measure the CPU time a WSGI application takes per request, including iterating and closing the response.
+
+    Parameters:
+    - application (callable): The WSGI application to call.
+    - requests (int): The number of requests.
+
+    Returns:
+    - float: The CPU time per request in microseconds.
+    """
+    environ = EnvironBuilder(path='/pet/1').get_environ()
+    start = time.process_time()
+    for _ in range(requests):
+        response = application(environ, lambda status, headers, exc_info=None: None)
+        for _ in response:
+            pass
+        if hasattr(response, 'close'):
+            response.close()
+    return (time.process_time() - start) / requests * 1e6
+
+
+def bench_threads(metrics: Metrics, records: int, threads: int):
+    """
+    Measure the wall-clock time per record of several threads recording at once.
+
+    Parameters:
+    - metrics (Metrics): The metrics to record into.
+    - records (int): The number of requests each thread records.
+    - threads (int): The number of threads.
+
+    Returns:
+    - float: The wall-clock time per record in microseconds.
+    """
+    workers = [threading.Thread(target=bench_record, args=(metrics, records)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (records * threads) * 1e6
+
+
+if __name__ == '__main__':
+    metrics = Metrics()
+    print(f'{"":<32}{"us":>8}')
+    print(f'{"Metrics.record":<32}{bench_record(metrics, 1000000):8.2f}')
+    print(f'{"Metrics.record, 8 threads":<32}{bench_threads(metrics, 125000, 8):8.2f}')
+    print(f'{"no middleware, per request":<32}{bench_middleware(empty_app, 200000):8.2f}')
+    print(f'{"middleware, per request":<32}{bench_middleware(MetricsMiddleware(empty_app, metrics), 200000):8.2f}')
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f'{"render /metrics":<32}{(time.perf_counter() - start) * 1e6:8.0f} ({len(body)} bytes)')
@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import sqlite_store  # noqa: E402
+from store import PetStore  # noqa: E402
+
+
+def build_store(size: int):
+    """
+    Build a pet store populated with the given number of pets.
+
+    Parameters:
+    - size (int): The number of pets to add.
+
+    Returns:
+    - PetStore: The populated store.
+    """
+    store = PetStore()
+    for pet_id in range(1, size + 1):
+        store.add({'id': pet_id, 'name': f'Pet{pet_id}', 'category': 'Dog', 'status': 'available'})
+    return store
+
+
+def build_sqlite_store(size: int, directory: str):
+    """
+    Build a SQLite-backed pet store populated with the given number of pets.
+
+    Parameters:
+    - size (int): The number of pets to add.
+    - directory (str): The directory to create the database in.
+
+    Returns:
+    - SqlitePetStore: The populated store.
+    """
+    database = sqlite_store.Database(os.path.join(directory, f'bench_{size}.db'))
+    store = sqlite_store.SqlitePetStore(database)
+    with database.transaction():
+        for pet_id in range(1, size + 1):
+            store.add({'id': pet_id, 'name': f'Pet{pet_id}', 'category': 'Dog', 'status': 'available'})
+    return store
+
+
+def bench_lookup(store, size: int, lookups: int = 100000):
+    """
+    Measure the average time of a pet lookup by ID.
+
+    Parameters:
+    - store: The store to look pets up in.
+    - size (int): The number of pets in the store.
+    - lookups (int): The number of random lookups to time.
+
+    Returns:
+    - float: The average lookup time in nanoseconds.
+    """
+    ids = [random.randint(1, size) for _ in range(lookups)]
+    elapsed = timeit.timeit(lambda: [store.get(pet_id) for pet_id in ids], number=1)
+    return elapsed / lookups * 1e9
+
+
+def bench_writes(store, size: int, writes: int = 1000):
+    """
+    Measure the average time of a status change and of a delete, which both update the status index.
+
+    Parameters:
+    - store: The store to write to.
+    - size (int): The number of pets in the store.
+    - writes (int): The number of status changes and of deletes to time.
+
+    Returns:
+    - tuple: The average status change and delete times in microseconds.
+    """
+    ids = random.sample(range(1, size + 1), 2 * writes)
+    updates = timeit.timeit(lambda: [store.update(pet_id, {'status': 'sold'}) for pet_id in ids[:writes]], number=1)
+    deletes = timeit.timeit(lambda: [store.delete(pet_id) for pet_id in ids[writes:]], number=1)
+    return updates / writes * 1e6, deletes / writes * 1e6
+
+
+if __name__ == '__main__':
+    print("In-memory store")
+    for size in (1000, 10000, 100000, 1000000):
+        store = build_store(size)
+        lookup = bench_lookup(store, size)
+        update, delete = bench_writes(store, size, size // 10)
+        print(f"{size:>8} pets: {lookup:9.1f} ns per lookup, {update:6.1f} us per status change, "
+              f"{delete:6.1f} us per delete")
+
+    print("SQLite store")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (1000, 10000, 100000, 1000000):
+            store = build_sqlite_store(size, directory)
+            print(f"{size:>8} pets: {bench_lookup(store, size, 20000):9.1f} ns per lookup")
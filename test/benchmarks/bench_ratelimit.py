@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+from app import app, rate_limit_client  # noqa: E402
+from ratelimit import RateLimit, RateLimitMiddleware  # noqa: E402
+
+
+def empty_app(environ, start_response):
+    start_response('200 OK', [('Content-Length', '0')])
+    return [b'']
+
+
+def bench_calls(application, environs: list, calls: int):
+    """
+    Measure the CPU time a WSGI application takes per request.
+
+    Parameters:
+    - application (callable): The WSGI application to call.
+    - environs (list): The environs to call it with, in turn.
+    - calls (int): The number of calls.
+
+    Returns:
+    - float: The CPU time per request in microseconds.
+    """
+    start = time.process_time()
+    for index in range(calls):
+        application(environs[index % len(environs)], lambda status, headers: None)
+    return (time.process_time() - start) / calls * 1e6
+
+
+def bench_threads(application, environs: list, calls: int, threads: int):
+    """
+    Measure the wall-clock time per request of several threads calling a WSGI application at once.
+
+    Parameters:
+    - application (callable): The WSGI application to call.
+    - environs (list): The environs to call it with, in turn; each thread uses its own slice.
+    - calls (int): The number of calls per thread.
+    - threads (int): The number of threads.
+
+    Returns:
+    - float: The wall-clock time per request in microseconds.
+    """
+    workers = [threading.Thread(target=bench_calls, args=(application, environs[index::threads], calls))
+               for index in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (calls * threads) * 1e6
+
+
+def make_environs(path: str, clients: int):
+    environs = []
+    for index in range(clients):
+        environ = EnvironBuilder(path=path).get_environ()
+        environ['REMOTE_ADDR'] = f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'
+        environs.append(environ)
+    return environs
+
+
+if __name__ == '__main__':
+    # Limits high enough that every request is let through, so only the limiter's own cost is measured
+    limits = {'find_pet_by_status': RateLimit(1e9, 1e9)}
+    limited = RateLimitMiddleware(empty_app, app.url_map, limits, rate_limit_client)
+
+    print(f'{"":<40}{"us/request":>10}')
+    one_client = make_environs('/pet/findByStatus', 1)
+    print(f'{"no middleware":<40}{bench_calls(empty_app, one_client, 200000):10.2f}')
+    print(f'{"unlimited route (URL match only)":<40}'
+          f'{bench_calls(limited, make_environs("/store/inventory", 1), 100000):10.2f}')
+    print(f'{"limited route, 1 client":<40}{bench_calls(limited, one_client, 100000):10.2f}')
+    many_clients = make_environs('/pet/findByStatus', 200000)
+    print(f'{"limited route, 200k clients (evicting)":<40}{bench_calls(limited, many_clients, 200000):10.2f}')
+    print(f'{"limited route, 8 threads, 200k clients":<40}{bench_threads(limited, many_clients, 25000, 8):10.2f}')
+    print(f'buckets kept: {len(limited.buckets)}')
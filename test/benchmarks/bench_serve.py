@@ -0,0 +1,60 @@
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def run_client(url: str, deadline: float, counts: list, index: int):
+    """
+    Send GET requests over one keep-alive connection until the deadline passes.
+
+    Parameters:
+    - url (str): The URL to request.
+    - deadline (float): The time.monotonic() value at which to stop.
+    - counts (list): Per-client request counters.
+    - index (int): The position of this client's counter.
+    """
+    parsed = urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    while time.monotonic() < deadline:
+        connection.request('GET', parsed.path)
+        response = connection.getresponse()
+        response.read()
+        if response.will_close:
+            connection.close()
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+        counts[index] += 1
+    connection.close()
+
+
+def bench_server(url: str, clients: int, duration: float):
+    """
+    Measure the throughput of a running server.
+
+    Parameters:
+    - url (str): The URL to request.
+    - clients (int): The number of concurrent clients.
+    - duration (float): How long to send requests for, in seconds.
+
+    Returns:
+    - float: The number of requests served per second.
+    """
+    counts = [0] * clients
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=run_client, args=(url, deadline, counts, index))
+               for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the requests/sec of a running Pet Store server.')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/store/inventory')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    print(f"{bench_server(args.url, args.clients, args.duration):.0f} requests/sec")
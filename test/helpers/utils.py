@@ -11,6 +11,9 @@ debug_file_name = ""
 def load_config():
     with open("../config/config.json", "r") as config_file:
         config_data = json.load(config_file)
+    # Allow running the suite against another server, e.g. for the sync/async parity run
+    if os.environ.get("PETSTORE_BASE_URL"):
+        config_data["base_url"] = os.environ["PETSTORE_BASE_URL"]
     return config_data
 
 
@@ -0,0 +1,60 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+SPECS_DIR = os.path.join(ROOT_DIR, 'test', 'specs')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server did not start listening on port {port}")
+
+
+@pytest.mark.parametrize("server_args, use_database", [
+    ([], False),
+    (["--asgi"], False),
+    ([], True),
+    (["--workers", "2"], True),
+], ids=["wsgi", "asgi", "wsgi-sqlite", "wsgi-sqlite-2-workers"])
+def test_specs_pass_against_server(server_args, use_database, tmp_path):
+    """
+    Run the spec suite against a freshly started sync (WSGI) or async (ASGI) server, backed by the
+    in-memory stores or by a SQLite database.
+
+    Expected Outcome:
+    - Every spec should pass against every server, so all of them expose the same routes and messages.
+    """
+    port = free_port()
+    server_env = dict(os.environ)
+    if use_database:
+        server_env["PETSTORE_DATABASE"] = str(tmp_path / "petstore.db")
+    server = subprocess.Popen([sys.executable, 'serve.py', '--port', str(port), *server_args],
+                              cwd=SRC_DIR, env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR, PETSTORE_BASE_URL=f"http://127.0.0.1:{port}")
+        result = subprocess.run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider'],
+                                cwd=SPECS_DIR, env=env, capture_output=True, text=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    assert result.returncode == 0, result.stdout
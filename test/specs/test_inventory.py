@@ -1,5 +1,5 @@
 import json
-from test.api.api_inventory import get_inventory, add_to_inventory, remove_from_inventory
+from test.api.api_inventory import get_inventory, add_to_inventory, remove_from_inventory, adjust_inventory_batch
 from test.api.api_pet import add_pet, delete_pet, update_pet
 from test.helpers.utils import multipoint_verification, set_debug_file_name, clear_log_files
 
@@ -43,6 +43,44 @@ def test_get_inventory():
     assert test_results == "No mismatch values"
 
 
+def test_get_inventory_streamed():
+    """
+    Test streaming the inventory as a JSON object and as newline-delimited JSON.
+
+    Expected Outcome:
+    - The status codes should be 200.
+    - Both streams should hold the 'Dog' category with the same quantity.
+    """
+    object_response = get_inventory(stream="json")
+    ndjson_response = get_inventory(stream="ndjson")
+
+    assert object_response.status_code == 200
+    assert ndjson_response.status_code == 200
+    streamed_inventory = json.loads(object_response.text)
+    lines = [json.loads(line) for line in ndjson_response.text.splitlines()]
+    assert {line["category"]: line["quantity"] for line in lines}["Dog"] == streamed_inventory["Dog"]
+
+
+def test_get_inventory_not_modified():
+    """
+    Test retrieving the inventory conditionally with the ETag of the version already held.
+
+    Expected Outcome:
+    - The status code should be 304 while the inventory is unchanged.
+    - After the inventory changes, the status code should be 200 with the new quantity.
+    """
+    response = get_inventory()
+    quantity = json.loads(response.text)["Dog"]
+    etag = response.headers['ETag']
+    assert get_inventory(etag=etag).status_code == 304
+
+    add_to_inventory("Dog", 1)
+    response = get_inventory(etag=etag)
+    assert response.status_code == 200
+    assert json.loads(response.text)["Dog"] == quantity + 1
+    remove_from_inventory("Dog", 1)
+
+
 def test_add_pet_inventory():
     """
     Test that adding a new pet automatically adds to the inventory with a default quantity of 1.
@@ -164,6 +202,85 @@ def test_remove_from_inventory_existing_category():
     assert test_results == "No mismatch values"
 
 
+def test_adjust_inventory_batch():
+    """
+    Test adding to and removing from the inventory in one batch request.
+
+    Expected Outcome:
+    - The status code should be 200, with a 200 result and the single add or remove message for each adjustment.
+    - The inventory should reflect every adjustment, applied in order.
+    """
+    quantity = json.loads(get_inventory().text)["Dog"]
+    response = adjust_inventory_batch([
+        {"operation": "add", "category": "Dog", "quantity": 3},
+        {"operation": "remove", "category": "Dog", "quantity": quantity + 1},
+        {"operation": "add", "category": "Dog", "quantity": 2}
+    ])
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           ["Added 3 to inventory for category Dog",
+                                            f"Removed {quantity + 1} from inventory for category Dog",
+                                            "Added 2 to inventory for category Dog"])
+    assert test_results == "No mismatch values"
+    assert [result["status"] for result in json.loads(response.text)["results"]] == [200, 200, 200]
+    assert json.loads(get_inventory().text)["Dog"] == 4
+
+
+def test_adjust_inventory_batch_is_atomic():
+    """
+    Test that a batch with a failing adjustment changes nothing.
+
+    Expected Outcome:
+    - The status code should be 400, with 'Not enough quantity in inventory' for the failing adjustment and
+      status 424 for the others.
+    - The inventory should be unchanged.
+    """
+    inventory_before = json.loads(get_inventory().text)
+    response = adjust_inventory_batch([
+        {"operation": "add", "category": "Dog", "quantity": 1},
+        {"operation": "remove", "category": "Dog", "quantity": inventory_before["Dog"] + 2}
+    ])
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Not enough quantity in inventory",
+                                            "Not applied because another adjustment failed"])
+    assert test_results == "No mismatch values"
+    assert [result["status"] for result in json.loads(response.text)["results"]] == [424, 400]
+    assert json.loads(get_inventory().text)["Dog"] == inventory_before["Dog"]
+
+
+def test_adjust_inventory_batch_invalid():
+    """
+    Test a batch with an invalid adjustment.
+
+    Expected Outcome:
+    - The status code should be 400, with a message indicating the missing field.
+    """
+    response = adjust_inventory_batch([{"operation": "add", "category": "Dog"}])
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Bad or missing data. Missing quantity field"])
+    assert test_results == "No mismatch values"
+
+
+def test_adjust_inventory_batch_category_not_string():
+    """
+    Test a batch with an adjustment whose category isn't a string.
+
+    Expected Outcome:
+    - The status code should be 400, with a message indicating the category must be a string.
+    """
+    response = adjust_inventory_batch([{"operation": "add", "category": ["Dog"], "quantity": 1}])
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Bad or missing data. Category must be a string"])
+    assert test_results == "No mismatch values"
+
+
 def test_cleanup_created_pets():
     """
     Clean up any pets created during the test.
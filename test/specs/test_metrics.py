@@ -0,0 +1,101 @@
+from test.api.api_metrics import get_metrics
+from test.helpers.utils import multipoint_verification, set_debug_file_name, clear_log_files
+from src.metrics import HISTOGRAM_BUCKETS, Histogram, Metrics, bucket_bounds, bucket_index
+
+
+def test_setup():
+    set_debug_file_name("api_metrics")
+    clear_log_files()
+
+
+#
+# GET /metrics tests
+#
+def test_get_metrics():
+    """
+    Test the functionality of retrieving the request metrics in the Prometheus text format.
+
+    Expected Outcome:
+    - The status code should be 200, with a text/plain content type.
+    - The response should describe the request counter, the byte counters and the latency histogram and summary.
+    """
+    response = get_metrics()
+
+    # Each worker process keeps its own metrics, so only the metrics families are checked, not the requests counted
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           ["# TYPE petstore_http_requests_total counter",
+                                            "# TYPE petstore_http_request_bytes_total counter",
+                                            "# TYPE petstore_http_response_bytes_total counter",
+                                            "# TYPE petstore_http_request_duration_seconds histogram",
+                                            "# TYPE petstore_http_request_latency_seconds summary"])
+    assert test_results == "No mismatch values"
+    assert response.headers["Content-Type"].startswith("text/plain")
+
+
+#
+# Histogram tests
+#
+def test_histogram_buckets():
+    """
+    Test the buckets values are counted in.
+
+    Expected Outcome:
+    - Values below 16 should each have their own bucket, and each power of two above should be split into 8 buckets.
+    - Every value should fall within the bounds of its bucket, and values too large should go in the last bucket.
+    """
+    assert [bucket_index(value) for value in (0, 1, 15, 16, 17, 18, 31, 32, 35, 36)] == [0, 1, 15, 16, 16, 17, 23,
+                                                                                            24, 24, 25]
+    assert [bucket_bounds(index) for index in (15, 16, 23, 24)] == [(15, 16), (16, 18), (30, 32), (32, 36)]
+    for value in list(range(5000)) + [2 ** bits + offset for bits in range(12, 32) for offset in (-1, 0, 1)]:
+        low, high = bucket_bounds(bucket_index(value))
+        assert low <= value < high
+    assert bucket_index(2 ** 40) == HISTOGRAM_BUCKETS - 1
+
+
+def test_histogram_quantiles():
+    """
+    Test the count, quantiles and cumulative counts of known values.
+
+    Actions:
+    - Record the values 1 to 100 once each.
+
+    Expected Outcome:
+    - The quantiles should be the upper bounds of the buckets holding the 50th, 99th and 100th values.
+    - The cumulative counts should be the number of values below each power of two.
+    """
+    histogram = Histogram()
+    assert histogram.quantile(0.5) == 0
+    for value in range(1, 101):
+        histogram.record(value)
+
+    assert (histogram.count(), histogram.total) == (100, 5050)
+    assert [histogram.quantile(quantile) for quantile in (0.5, 0.99, 1)] == [52, 104, 104]
+    cumulative = dict(histogram.cumulative_powers_of_two())
+    assert [cumulative[bound] for bound in (16, 32, 64, 128, 2 ** 32)] == [15, 31, 63, 100, 100]
+
+
+def test_metrics_record_matches_histogram():
+    """
+    Test that recording a request counts its latency in the same bucket as Histogram.record.
+
+    Actions:
+    - Record requests with latencies from under a microsecond to beyond the largest value told apart.
+
+    Expected Outcome:
+    - The latency histogram of the endpoint should equal one built with Histogram.record.
+    - The status codes and byte counts should be counted.
+    """
+    metrics = Metrics()
+    expected = Histogram()
+    for duration_ns in [0, 999, 1000, 15999, 16000, 150000, 2 ** 40 * 1000] + [7 ** power for power in range(25)]:
+        metrics.record("get_pet", 200, duration_ns, 10, 100)
+        expected.record(duration_ns // 1000)
+    metrics.record("get_pet", 404, 1000, 0, 20)
+    expected.record(1)
+
+    series = metrics.snapshot()["get_pet"]
+    assert series.latencies.counts == expected.counts
+    assert series.latencies.total == expected.total
+    assert series.statuses == {200: 32, 404: 1}
+    assert (series.request_bytes, series.response_bytes) == (320, 3220)
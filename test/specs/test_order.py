@@ -0,0 +1,295 @@
+from test.api.api_order import place_order, place_orders_bulk, get_order, get_all_orders, delete_order
+from test.api.basic_requests import get
+from test.api.api_inventory import add_to_inventory, get_inventory
+from test.api.api_pet import add_pet, delete_pet
+from test.helpers.utils import (generate_random_pet_data, set_debug_file_name,
+                                multipoint_verification, clear_log_files)
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+created_pet_ids = []
+created_order_ids = []
+
+
+def stock_category(quantity: int):
+    """
+    Add a pet with a fresh category and stock that category with the given quantity.
+
+    Parameters:
+    - quantity (int): The total quantity the category should hold.
+
+    Returns:
+    - str: The stocked category.
+    """
+    test_data = generate_random_pet_data()
+    category = "Category" + test_data["name"]
+    response = add_pet(test_data["name"], category, test_data["status"])
+    created_pet_ids.append(json.loads(response.text)['id'])
+    if quantity > 1:
+        add_to_inventory(category, quantity - 1)
+    return category
+
+
+def test_setup():
+    set_debug_file_name("api_order")
+    clear_log_files()
+
+
+#
+# POST /store/order tests
+#
+def test_place_order():
+    """
+    Test the functionality of placing an order.
+
+    Expected Outcome:
+    - The status code should be 201, indicating the order was placed.
+    - The response JSON should contain the order's petId, quantity and status.
+    """
+    category = stock_category(5)
+    response = place_order(category, 2)
+    order = json.loads(response.text)
+    created_order_ids.append(order['orderId'])
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           201,
+                                           [category, "placed"])
+    assert test_results == "No mismatch values"
+
+
+def test_place_order_not_enough_inventory():
+    """
+    Test placing an order for more than the available quantity.
+
+    Expected Outcome:
+    - The status code should be 400, indicating there is not enough inventory.
+    """
+    category = stock_category(1)
+    response = place_order(category, 2)
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Not enough inventory for the specified pet"])
+    assert test_results == "No mismatch values"
+
+
+def test_place_order_concurrently_never_oversells():
+    """
+    Stress test placing orders for the same category from many threads at once.
+
+    Actions:
+    - Stock a category with 50 units.
+    - Place 100 single-unit orders for it from 16 threads.
+
+    Expected Outcome:
+    - Exactly 50 orders should succeed with 201 and the rest should fail with 400.
+    - The category's inventory should end at 0 and never go negative.
+    """
+    category = stock_category(50)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        responses = list(executor.map(lambda _: place_order(category, 1), range(100)))
+
+    placed = [json.loads(response.text) for response in responses if response.status_code == 201]
+    created_order_ids.extend(order['orderId'] for order in placed)
+
+    assert len(placed) == 50
+    assert all(response.status_code == 400 for response in responses if response.status_code != 201)
+    assert len({order['orderId'] for order in placed}) == 50
+    assert json.loads(get_inventory().text)[category] == 0
+
+
+#
+# POST /store/orders/bulk tests
+#
+def test_place_orders_bulk():
+    """
+    Test placing several orders in one request, with one line item asking for more than is left.
+
+    Expected Outcome:
+    - The status code should be 200, with a 201 result and the placed order for each line item that fits the
+      inventory, and a 400 result for the one that doesn't.
+    - The inventory should only be reduced by the placed orders.
+    """
+    first_category = stock_category(3)
+    second_category = stock_category(1)
+    response = place_orders_bulk([
+        {"petId": first_category, "quantity": 2},
+        {"petId": second_category, "quantity": 1},
+        {"petId": first_category, "quantity": 2},
+        {"petId": second_category}
+    ])
+    body = json.loads(response.text)
+    created_order_ids.extend(result['order']['orderId'] for result in body['results'] if result['status'] == 201)
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           ["Not enough inventory for the specified pet",
+                                            "Bad or missing data. Missing quantity field"])
+    assert test_results == "No mismatch values"
+    assert [result['status'] for result in body['results']] == [201, 201, 400, 400]
+    assert body['placed'] == 2
+    inventory = json.loads(get_inventory().text)
+    assert inventory[first_category] == 1
+    assert inventory[second_category] == 0
+
+
+def test_place_orders_bulk_concurrently_never_oversells():
+    """
+    Stress test placing bulk orders for the same category from many threads at once.
+
+    Actions:
+    - Stock a category with 50 units.
+    - Place 20 bulk orders of 5 single-unit line items each from 8 threads.
+
+    Expected Outcome:
+    - Exactly 50 line items should be placed, with unique order IDs, and the inventory should end at 0.
+    """
+    category = stock_category(50)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: place_orders_bulk([{"petId": category, "quantity": 1}] * 5),
+                                      range(20)))
+
+    placed = [result['order'] for response in responses for result in json.loads(response.text)['results']
+              if result['status'] == 201]
+    created_order_ids.extend(order['orderId'] for order in placed)
+
+    assert len(placed) == 50
+    assert len({order['orderId'] for order in placed}) == 50
+    assert json.loads(get_inventory().text)[category] == 0
+
+
+#
+# GET/DELETE /store/order/<order_id> tests
+#
+def test_order_ids_stable_after_delete():
+    """
+    Test that deleting an order does not change the IDs of other orders.
+
+    Expected Outcome:
+    - The deleted order should no longer be found.
+    - A later order should still be found under its own ID.
+    - A new order should get an ID that was never used before.
+    """
+    category = stock_category(10)
+    first_order = json.loads(place_order(category, 1).text)
+    second_order = json.loads(place_order(category, 1).text)
+    created_order_ids.append(second_order['orderId'])
+
+    response = delete_order(first_order['orderId'])
+    assert response.status_code == 200
+    assert get_order(first_order['orderId']).status_code == 404
+
+    response = get_order(second_order['orderId'])
+    assert response.status_code == 200
+    assert json.loads(response.text)['orderId'] == second_order['orderId']
+
+    third_order = json.loads(place_order(category, 1).text)
+    created_order_ids.append(third_order['orderId'])
+    assert third_order['orderId'] not in (first_order['orderId'], second_order['orderId'])
+
+
+def test_get_order_not_found():
+    """
+    Test retrieving an order that does not exist.
+
+    Expected Outcome:
+    - The status code should be 404, indicating the order was not found.
+    """
+    response = get_order(999999999)
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           404,
+                                           ["Order not found"])
+    assert test_results == "No mismatch values"
+
+
+#
+# GET /store/orders tests
+#
+def test_get_all_orders_paginated():
+    """
+    Test listing orders page by page by following the 'next' links.
+
+    Expected Outcome:
+    - Every page should hold at most the requested number of orders, ordered by ID.
+    - Following the 'next' links should list every placed order exactly once, and the last page should have no link.
+    """
+    category = stock_category(5)
+    placed_ids = [json.loads(place_order(category, 1).text)['orderId'] for _ in range(5)]
+    created_order_ids.extend(placed_ids)
+
+    listed_ids = []
+    response = get_all_orders(limit=2)
+    while True:
+        assert response.status_code == 200
+        page = json.loads(response.text)
+        assert len(page['items']) <= 2
+        listed_ids.extend(order['orderId'] for order in page['items'])
+        if page['next'] is None:
+            break
+        response = get(page['next'])
+
+    assert listed_ids == sorted(listed_ids)
+    assert len(listed_ids) == len(set(listed_ids))
+    assert set(placed_ids) <= set(listed_ids)
+
+
+def test_get_all_orders_streamed():
+    """
+    Test streaming all orders as a JSON array and as newline-delimited JSON.
+
+    Expected Outcome:
+    - The status codes should be 200, with the JSON and NDJSON content types.
+    - Both streams should list every placed order, ordered by ID, with the same orders in each.
+    """
+    category = stock_category(3)
+    placed_ids = [json.loads(place_order(category, 1).text)['orderId'] for _ in range(3)]
+    created_order_ids.extend(placed_ids)
+
+    array_response = get_all_orders(stream="json")
+    ndjson_response = get_all_orders(stream="ndjson")
+
+    assert array_response.status_code == 200
+    assert ndjson_response.status_code == 200
+    assert array_response.headers['Content-Type'] == "application/json"
+    assert ndjson_response.headers['Content-Type'] == "application/x-ndjson"
+    streamed_orders = json.loads(array_response.text)
+    assert [json.loads(line) for line in ndjson_response.text.splitlines()] == streamed_orders
+    listed_ids = [order['orderId'] for order in streamed_orders]
+    assert listed_ids == sorted(listed_ids)
+    assert set(placed_ids) <= set(listed_ids)
+
+
+def test_get_all_orders_invalid_pagination():
+    """
+    Test listing orders with an invalid limit and an invalid cursor.
+
+    Expected Outcome:
+    - The status codes should be 400, with messages indicating which parameter is invalid.
+    """
+    response = get_all_orders(limit=0)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Limit parameter is invalid; should be between 1 and 1000"])
+    assert test_results == "No mismatch values"
+
+    response = get_all_orders(cursor="not-a-cursor")
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Cursor parameter is invalid"])
+    assert test_results == "No mismatch values"
+
+
+def test_cleanup_created_orders_and_pets():
+    print(f"\n\nPost suite order cleanup...")
+    for order_id in created_order_ids:
+        response = delete_order(order_id)
+        print(f"Deleted order {order_id}, status code: {response.status_code}")
+    for pet_id in created_pet_ids:
+        response = delete_pet(pet_id)
+        print(f"Deleted pet with ID {pet_id}, status code: {response.status_code}")
@@ -1,9 +1,12 @@
-from test.api.api_pet import add_pet, get_pet, delete_pet, update_pet, find_pet_by_status, upload_image
+from test.api.api_pet import (add_pet, add_pets_bulk, add_pets_bulk_ndjson, add_pets_bulk_raw, get_pet, delete_pet, update_pet,
+                              find_pet_by_status, upload_image, get_pet_image)
+from test.api.basic_requests import get, put
 from test.helpers.utils import (generate_random_pet_data, set_debug_file_name,
                                 multipoint_verification, clear_log_files)
 import json
 import os
-import pytest
+import tempfile
+import time
 
 # BASE_URL = "http://127.0.0.1:5000"  # Update with your actual server URL
 created_pet_ids = []
@@ -169,6 +172,147 @@ def test_add_pet_duplicate():
     assert test_results == "No mismatch values"
 
 
+#
+# POST /pet/bulk tests
+#
+def test_add_pets_bulk():
+    """
+    Test adding many pets in one request with a JSON array.
+
+    Actions:
+    - Send a JSON array with two valid pets, a duplicate of the first one and a pet with a missing name.
+
+    Expected Outcome:
+    - The status code should be 200.
+    - The valid pets should be added with a status of 201 and be retrievable.
+    - The duplicate and the invalid pet should fail with a status of 400 and the same messages as POST /pet.
+    """
+    first_pet_data = generate_random_pet_data()
+    second_pet_data = generate_random_pet_data()
+    missing_name_data = generate_random_pet_data()
+    del missing_name_data["name"]
+
+    response = add_pets_bulk([first_pet_data, second_pet_data, first_pet_data, missing_name_data])
+    body = json.loads(response.text)
+    results = body["results"]
+    created_pet_ids.extend(result["pet"]["id"] for result in results if result["status"] == 201)
+
+    assert response.status_code == 200
+    assert (body["added"], body["failed"]) == (2, 2)
+    assert [result["status"] for result in results] == [201, 201, 400, 400]
+    assert results[2]["message"] == "Pet with the same name and category already exists"
+    assert results[3]["message"] == "Bad or missing data. Missing name field"
+    assert json.loads(get_pet(results[1]["pet"]["id"]).text)["name"] == second_pet_data["name"]
+
+
+def test_add_pets_bulk_streamed_results():
+    """
+    Test adding many pets with the results streamed as a JSON array and as newline-delimited JSON.
+
+    Expected Outcome:
+    - The status code should be 200 for both requests.
+    - The JSON array should hold the result of each pet, without the counts.
+    - The NDJSON stream should hold one result per line.
+    """
+    pets_data = [generate_random_pet_data(), generate_random_pet_data()]
+
+    response = add_pets_bulk(pets_data, stream="json")
+    results = json.loads(response.text)
+    created_pet_ids.extend(result["pet"]["id"] for result in results if result["status"] == 201)
+
+    assert response.status_code == 200
+    assert [(result["index"], result["status"]) for result in results] == [(0, 201), (1, 201)]
+
+    response = add_pets_bulk(pets_data, stream="ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [result["status"] for result in results] == [400, 400]
+    assert results[0]["message"] == "Pet with the same name and category already exists"
+
+
+def test_add_pets_bulk_ndjson():
+    """
+    Test adding many pets in one request with newline-delimited JSON.
+
+    Actions:
+    - Send a valid pet, a line that isn't valid JSON and another valid pet, one per line.
+
+    Expected Outcome:
+    - The status code should be 200.
+    - Both valid pets should be added and the invalid line should fail with a status of 400.
+    """
+    first_pet_data = generate_random_pet_data()
+    second_pet_data = generate_random_pet_data()
+
+    response = add_pets_bulk_ndjson([json.dumps(first_pet_data), "{not json", json.dumps(second_pet_data)])
+    results = json.loads(response.text)["results"]
+    created_pet_ids.extend(result["pet"]["id"] for result in results if result["status"] == 201)
+
+    assert response.status_code == 200
+    assert [result["status"] for result in results] == [201, 400, 201]
+    assert results[1]["message"] == "Bad or missing data. Invalid JSON"
+
+
+def test_add_pets_bulk_ndjson_chunked():
+    """
+    Test adding many pets with newline-delimited JSON sent with chunked transfer encoding.
+
+    Expected Outcome:
+    - The status code should be 200.
+    - Both pets should be added, although the request has no Content-Length.
+    """
+    pets_data = [generate_random_pet_data(), generate_random_pet_data()]
+
+    response = add_pets_bulk_ndjson([json.dumps(pet_data) for pet_data in pets_data], chunked=True)
+    body = json.loads(response.text)
+    created_pet_ids.extend(result["pet"]["id"] for result in body["results"] if result["status"] == 201)
+
+    assert response.status_code == 200
+    assert (body["added"], body["failed"]) == (2, 0)
+
+
+def test_add_pets_bulk_invalid_json_after_batch():
+    """
+    Test adding many pets with a JSON array that becomes invalid after a whole batch of pets was added.
+
+    Actions:
+    - Send 1500 valid available pets, more than one batch, followed by data that isn't valid JSON.
+
+    Expected Outcome:
+    - The status code should be 200.
+    - The results should hold the pets of the first batch, which were added, followed by a result with a status of
+      400 indicating the body is not a valid JSON array.
+    """
+    body = json.dumps([generate_random_pet_data(status="available") for _ in range(1500)])[:-1] + ", {not json]"
+
+    response = add_pets_bulk_raw(body)
+    results = json.loads(response.text)["results"]
+    created_pet_ids.extend(result["pet"]["id"] for result in results if result["status"] == 201)
+
+    assert response.status_code == 200
+    assert len(results) == 1001
+    assert results[-1] == {"index": 1000, "status": 400, "message": "Bad or missing data. Invalid JSON array"}
+    assert all(result["status"] == 201 for result in results[:-1])
+
+
+def test_add_pets_bulk_invalid_json():
+    """
+    Test adding many pets with a body that isn't a JSON array.
+
+    Expected Outcome:
+    - The status code should be 400, indicating the body is not a valid JSON array.
+    """
+    response = add_pets_bulk({"name": "NotAnArray"})
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Bad or missing data. Invalid JSON array"])
+    assert test_results == "No mismatch values"
+
+
 #
 # GET /pet tests
 #
@@ -213,6 +357,32 @@ def test_get_pet():
     assert test_results == "No mismatch values"
 
 
+def test_get_pet_not_modified():
+    """
+    Test retrieving a pet conditionally with the ETag of the version already held.
+
+    Expected Outcome:
+    - The status code should be 304 with an empty body while the pet is unchanged.
+    - After the pet is updated, the status code should be 200 with the updated pet and a new ETag.
+    """
+    test_data = generate_random_pet_data()
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+
+    etag = get_pet(pet['id']).headers['ETag']
+    response = get_pet(pet['id'], etag)
+    assert response.status_code == 304
+    assert response.text == ""
+    assert response.headers['ETag'] == etag
+
+    update_pet(pet['id'], status="sold")
+    response = get_pet(pet['id'], etag)
+    assert response.status_code == 200
+    assert json.loads(response.text)['status'] == "sold"
+    assert response.headers['ETag'] != etag
+
+
 def test_get_pet_id_0():
     """
     Test the functionality of retrieving a pet from the Pet Store with ID 0.
@@ -454,6 +624,34 @@ def test_update_pet_status_missing():
     assert test_results == "No mismatch values"
 
 
+def test_update_pet_invalid_types():
+    """
+    Test updating a pet with a name that isn't a string and with a null status.
+
+    Expected Outcome:
+    - The status code should be 400 for both updates, indicating the field must be a string.
+    - The pet should be unchanged.
+    """
+    initial_data = generate_random_pet_data()
+    response = add_pet(initial_data["name"], initial_data["category"], initial_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+
+    response = put(f"/pet/{pet['id']}", {"name": 5}, {"content-type": "application/json"})
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Name must be a string"])
+    assert test_results == "No mismatch values"
+
+    response = put(f"/pet/{pet['id']}", {"status": None}, {"content-type": "application/json"})
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Status must be a string"])
+    assert test_results == "No mismatch values"
+
+    assert json.loads(get_pet(pet['id']).text) == pet
+
+
 def test_update_pet_not_found():
     """
     Test the functionality of updating a pet in the Pet Store by ID when the pet is not found.
@@ -511,6 +709,43 @@ def test_update_pet_duplicate():
     assert test_results == "No mismatch values"
 
 
+def test_update_pet_rename_frees_name():
+    """
+    Test that renaming a pet frees its previous name and category for a new pet.
+
+    Actions:
+    - Generate random pet data and add a new pet.
+    - Rename the pet.
+    - Add a second pet with the original name and category of the first pet.
+
+    Expected Outcome:
+    - The status code should be 201, indicating the second pet was added.
+    - Updating the second pet with the first pet's new name should return 400 as a duplicate.
+    """
+    # Add a pet and rename it
+    test_data = generate_random_pet_data()
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    first_pet = json.loads(response.text)
+    created_pet_ids.append(first_pet['id'])
+    new_name = generate_random_pet_data()["name"]
+    update_pet(first_pet['id'], name=new_name)
+
+    # Add a second pet with the original name and category
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    second_pet = json.loads(response.text)
+    created_pet_ids.append(second_pet['id'])
+    assert response.status_code == 201
+
+    # Renaming the second pet to the first pet's new name is a duplicate
+    response = update_pet(second_pet['id'], name=new_name)
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Pet with the same name and category already exists"])
+    assert test_results == "No mismatch values"
+
+
 #
 # DELETE /pet tests
 #
@@ -624,6 +859,94 @@ def test_find_pet_by_status_available():
     assert any(p['id'] == pet['id'] for p in json.loads(response.text))
 
 
+def test_find_pet_by_status_after_update():
+    """
+    Test that finding pets by status reflects a pet's updated status.
+
+    Actions:
+    - Add a new pet with 'pending' status.
+    - Update the pet's status to 'sold'.
+    - Perform GET requests to find pets by 'pending' and 'sold' status.
+
+    Expected Outcome:
+    - The status codes should be 200, indicating successful retrievals.
+    - The pet should only be found by its new 'sold' status.
+    """
+    # Generate and add a pet with 'pending' status, then mark it as sold
+    test_data = generate_random_pet_data(status="pending")
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+    update_pet(pet['id'], status="sold")
+
+    # Find pets by the old and the new status
+    pending_response = find_pet_by_status("pending")
+    sold_response = find_pet_by_status("sold")
+
+    # Validate the outcome of the test
+    assert pending_response.status_code == 200
+    assert sold_response.status_code == 200
+    assert not any(p['id'] == pet['id'] for p in json.loads(pending_response.text))
+    assert any(p['id'] == pet['id'] for p in json.loads(sold_response.text))
+
+
+def test_find_pet_by_status_paginated():
+    """
+    Test finding pets by status page by page.
+
+    Actions:
+    - Add three pets with 'pending' status.
+    - Find pets by 'pending' status one page at a time with a page size of 1, following the 'next' links.
+
+    Expected Outcome:
+    - Every page should hold a single pet, and every added pet should be listed exactly once.
+    """
+    added_ids = []
+    for _ in range(3):
+        test_data = generate_random_pet_data(status="pending")
+        response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+        added_ids.append(json.loads(response.text)['id'])
+    created_pet_ids.extend(added_ids)
+
+    listed_ids = []
+    response = find_pet_by_status("pending", limit=1)
+    while True:
+        assert response.status_code == 200
+        page = json.loads(response.text)
+        assert len(page['items']) <= 1
+        listed_ids.extend(pet['id'] for pet in page['items'])
+        if page['next'] is None:
+            break
+        response = get(page['next'])
+
+    assert len(listed_ids) == len(set(listed_ids))
+    assert set(added_ids) <= set(listed_ids)
+
+
+def test_find_pet_by_status_streamed():
+    """
+    Test finding pets by status as a streamed JSON array and as newline-delimited JSON.
+
+    Expected Outcome:
+    - The status codes should be 200.
+    - Both streams should list the same pets, including the added pet, as the unstreamed response.
+    """
+    test_data = generate_random_pet_data(status="sold")
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+
+    response = find_pet_by_status("sold")
+    array_response = find_pet_by_status("sold", stream="json")
+    ndjson_response = find_pet_by_status("sold", stream="ndjson")
+
+    assert array_response.status_code == 200
+    assert ndjson_response.status_code == 200
+    assert json.loads(array_response.text) == json.loads(response.text)
+    assert [json.loads(line) for line in ndjson_response.text.splitlines()] == json.loads(response.text)
+    assert pet in json.loads(array_response.text)
+
+
 def test_find_pet_by_status_invalid():
     """
     Test finding pets by an invalid status.
@@ -645,10 +968,28 @@ def test_find_pet_by_status_invalid():
     assert test_results == "No mismatch values"
 
 
+def test_find_pet_by_status_rate_limited():
+    """
+    Test that a client flooding the status search is rate limited.
+
+    Expected Outcome:
+    - Once the client's burst is used up, requests should return a status code of 429 with a Retry-After header.
+    """
+    for _ in range(1000):
+        response = find_pet_by_status("sold", limit=1)
+        if response.status_code == 429:
+            break
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           429,
+                                           ["Too many requests"])
+    assert test_results == "No mismatch values"
+    assert int(response.headers['Retry-After']) >= 1
+
+
 #
 # POST /pet/<int:pet_id>/uploadImage tests
 #
-@pytest.mark.skip(reason="Test is blocked due to dependency on a feature that is not yet implemented.")
 def test_upload_valid_image():
     """
     Test the functionality of uploading a valid image for a pet.
@@ -682,7 +1023,6 @@ def test_upload_valid_image():
     assert test_results == "No mismatch values"
 
 
-@pytest.mark.skip(reason="Test is blocked due to dependency on a feature that is not yet implemented.")
 def test_upload_invalid_file():
     """
     Test the functionality of uploading an invalid file for a pet.
@@ -703,17 +1043,44 @@ def test_upload_invalid_file():
     created_pet_ids.append(pet['id'])
 
     # Path to an invalid file (non-image)
-    invalid_file_path = os.path.join(os.path.dirname(__file__), '..', "data", "invalid_file.txt")
+    invalid_file_path = os.path.join(os.path.dirname(__file__), '..', "data", "invalid_image.txt")
 
     # Perform the POST request to upload the invalid file
     response = upload_image(pet['id'], invalid_file_path)
 
     # Validate the outcome of the test with a single assert statement
-    # Expecting a failure due to the invalid file type (depends on API implementation)
+    # Expecting a failure due to the invalid file type
     test_results = multipoint_verification(response.text, response.status_code,
                                            400,
-                                           ["No selected file",
-                                            "Invalid file type"])
+                                           ["Invalid file type"])
+    assert test_results == "No mismatch values"
+
+
+def test_upload_image_too_large():
+    """
+    Test uploading an image larger than the server's 10 MiB default limit.
+
+    Actions:
+    - Add a new pet.
+    - Upload a file of 11 MiB starting with a JPEG signature.
+
+    Expected Outcome:
+    - The status code should be 413, indicating the image is too large.
+    """
+    test_data = generate_random_pet_data()
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+
+    with tempfile.TemporaryDirectory() as directory:
+        large_image_path = os.path.join(directory, "large_image.jpg")
+        with open(large_image_path, "wb") as file:
+            file.write(b"\xff\xd8\xff\xe0" + bytes(11 * 1024 * 1024))
+        response = upload_image(pet['id'], large_image_path)
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           413,
+                                           ["Image too large"])
     assert test_results == "No mismatch values"
 
 
@@ -746,6 +1113,114 @@ def test_upload_image_invalid_pet_id():
     assert test_results == "No mismatch values"
 
 
+#
+# GET /pet/<int:pet_id>/image tests
+#
+def test_get_pet_image():
+    """
+    Test downloading an uploaded image, whole, by range and conditionally.
+
+    Expected Outcome:
+    - The whole image should be returned with a status code of 200 and its digest as the ETag.
+    - A Range request should return the requested bytes with a status code of 206.
+    - A request with the ETag in If-None-Match should return a status code of 304.
+    """
+    test_data = generate_random_pet_data()
+    response = add_pet(test_data["name"], test_data["category"], test_data["status"])
+    pet = json.loads(response.text)
+    created_pet_ids.append(pet['id'])
+    valid_image_path = os.path.join(os.path.dirname(__file__), '..', "data", "valid_image.jpg")
+    with open(valid_image_path, 'rb') as file:
+        content = file.read()
+    digest = json.loads(upload_image(pet['id'], valid_image_path).text)['digest']
+
+    response = get_pet_image(pet['id'])
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers['ETag'] == f'"{digest}"'
+
+    response = get_pet_image(pet['id'], {"Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert response.content == content[:100]
+
+    response = get_pet_image(pet['id'], {"If-None-Match": f'"{digest}"'})
+    assert response.status_code == 304
+
+
+def test_upload_same_image_is_deduplicated():
+    """
+    Test that the same image uploaded for two pets is stored once.
+
+    Expected Outcome:
+    - Both uploads should return a status code of 201 with the same digest.
+    """
+    valid_image_path = os.path.join(os.path.dirname(__file__), '..', "data", "valid_image.jpg")
+    digests = []
+    for _ in range(2):
+        test_data = generate_random_pet_data()
+        pet = json.loads(add_pet(test_data["name"], test_data["category"], test_data["status"]).text)
+        created_pet_ids.append(pet['id'])
+        response = upload_image(pet['id'], valid_image_path)
+        assert response.status_code == 201
+        digests.append(json.loads(response.text)['digest'])
+
+    assert digests[0] == digests[1]
+
+
+def test_get_pet_image_resized():
+    """
+    Test downloading a resized copy of an uploaded image once it has been generated in the background.
+
+    Expected Outcome:
+    - Until the resized copies are ready, the original should be returned.
+    - Once X-Thumbnail-Status is 'ready', a WebP copy smaller than the original should be returned.
+    - An unsupported size should return a status code of 400.
+    """
+    test_data = generate_random_pet_data()
+    pet = json.loads(add_pet(test_data["name"], test_data["category"], test_data["status"]).text)
+    created_pet_ids.append(pet['id'])
+    valid_image_path = os.path.join(os.path.dirname(__file__), '..', "data", "valid_image.jpg")
+    original_size = json.loads(upload_image(pet['id'], valid_image_path).text)['size']
+
+    # The resized copies are generated by a worker process, so poll until they are done
+    deadline = time.time() + 30
+    response = get_pet_image(pet['id'], size=128)
+    while response.headers['X-Thumbnail-Status'] == "pending" and time.time() < deadline:
+        assert response.headers['Content-Type'] == "image/jpeg"
+        time.sleep(0.1)
+        response = get_pet_image(pet['id'], size=128)
+
+    assert response.status_code == 200
+    assert response.headers['X-Thumbnail-Status'] == "ready"
+    assert response.headers['Content-Type'] == "image/webp"
+    assert len(response.content) < original_size
+
+    response = get_pet_image(pet['id'], size=64)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Size parameter is invalid; should be 128 or 512"])
+    assert test_results == "No mismatch values"
+
+
+def test_get_pet_image_not_uploaded():
+    """
+    Test downloading the image of a pet without one.
+
+    Expected Outcome:
+    - The status code should be 404, with a message indicating the image was not found.
+    """
+    test_data = generate_random_pet_data()
+    pet = json.loads(add_pet(test_data["name"], test_data["category"], test_data["status"]).text)
+    created_pet_ids.append(pet['id'])
+
+    response = get_pet_image(pet['id'])
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           404,
+                                           ["Image not found"])
+    assert test_results == "No mismatch values"
+
+
 def test_cleanup_created_pets():
     print(f"\n\nPost suite pet cleanup...")
     for pet_id in created_pet_ids:
@@ -0,0 +1,291 @@
+from test.api.api_user import create_user, login_user, logout_user, get_user, update_user, delete_user
+from test.helpers.utils import set_debug_file_name, multipoint_verification, clear_log_files
+import json
+import random
+import string
+
+created_usernames = []
+
+
+def random_username():
+    return "user_" + ''.join(random.choices(string.ascii_lowercase, k=10))
+
+
+def test_setup():
+    set_debug_file_name("api_user")
+    clear_log_files()
+
+
+#
+# POST /user tests
+#
+def test_create_user():
+    """
+    Test the functionality of creating a new user.
+
+    Expected Outcome:
+    - The status code should be 201, indicating a successful creation.
+    - The response JSON should contain the created user's username and email.
+    """
+    username = random_username()
+    response = create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           201,
+                                           [username, f"{username}@example.com"])
+    assert test_results == "No mismatch values"
+
+
+def test_create_user_duplicate():
+    """
+    Test that creating a user with an existing username is rejected.
+
+    Expected Outcome:
+    - The status code should be 400, indicating a bad request due to the duplicate username.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = create_user(username, f"{username}@example.com", "secret")
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Username already exists"])
+    assert test_results == "No mismatch values"
+
+
+def test_create_user_duplicate_different_case():
+    """
+    Test that usernames differing only in case belong to the same user.
+
+    Expected Outcome:
+    - Creating a user whose username differs only in case should return a status code of 400.
+    - The user should be found by its username in any case.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = create_user(username.upper(), f"{username}@example.com", "secret")
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Username already exists"])
+    assert test_results == "No mismatch values"
+
+    response = get_user(username.upper())
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           [username])
+    assert test_results == "No mismatch values"
+
+
+def test_create_user_hides_password():
+    """
+    Test that the password of a user is never returned, neither in plaintext nor hashed.
+
+    Expected Outcome:
+    - Neither the created user nor the retrieved user should contain a password field.
+    """
+    username = random_username()
+    response = create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    assert response.status_code == 201
+    assert "password" not in json.loads(response.text)
+
+    response = get_user(username)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           [username],
+                                           ["password", "secret"])
+    assert test_results == "No mismatch values"
+
+
+def test_create_user_password_not_string():
+    """
+    Test that a password which isn't a string is rejected when creating or updating a user.
+
+    Expected Outcome:
+    - The status code should be 400 for both requests, indicating the password must be a string.
+    """
+    username = random_username()
+    response = create_user(username, f"{username}@example.com", 12345)
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Password must be a string"])
+    assert test_results == "No mismatch values"
+
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = update_user(username, f"{username}@example.org", 12345)
+
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           400,
+                                           ["Password must be a string"])
+    assert test_results == "No mismatch values"
+
+
+#
+# GET /user/login tests
+#
+def test_login_user():
+    """
+    Test logging in with valid credentials.
+
+    Expected Outcome:
+    - The status code should be 200, indicating a successful login.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = login_user(username, "secret")
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           ["Login successful"])
+    assert test_results == "No mismatch values"
+
+
+def test_login_user_wrong_password():
+    """
+    Test logging in with an invalid password.
+
+    Expected Outcome:
+    - The status code should be 401, indicating the credentials were rejected.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = login_user(username, "wrong")
+
+    # Validate the outcome of the test with a single assert statement
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           401,
+                                           ["Invalid username or password"])
+    assert test_results == "No mismatch values"
+
+
+def test_login_user_after_password_update():
+    """
+    Test that updating a user's password replaces the old one.
+
+    Expected Outcome:
+    - Logging in with the new password should succeed with a status code of 200.
+    - Logging in with the old password should fail with a status code of 401.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    response = update_user(username, f"{username}@example.com", "new-secret")
+    assert response.status_code == 200
+    assert "password" not in json.loads(response.text)
+
+    assert login_user(username, "new-secret").status_code == 200
+    response = login_user(username, "secret")
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           401,
+                                           ["Invalid username or password"])
+    assert test_results == "No mismatch values"
+
+
+def test_update_user_with_session_token():
+    """
+    Test authenticating an update with the session token returned by the login.
+
+    Expected Outcome:
+    - The login should return a session token.
+    - An update with the user's own token should return a status code of 200.
+    - An update of another user with that token should return a status code of 403.
+    - An update with a forged token should return a status code of 401.
+    """
+    username = random_username()
+    other_username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    create_user(other_username, f"{other_username}@example.com", "secret")
+    created_usernames.extend([username, other_username])
+    token = json.loads(login_user(username, "secret").text)["token"]
+
+    response = update_user(username, f"{username}@example.org", "secret", token)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           [f"{username}@example.org"])
+    assert test_results == "No mismatch values"
+
+    response = update_user(other_username, f"{other_username}@example.org", "secret", token)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           403,
+                                           ["Session token belongs to another user"])
+    assert test_results == "No mismatch values"
+
+    response = update_user(username, f"{username}@example.org", "secret", token[:-4] + "AAAA")
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           401,
+                                           ["Invalid or expired session token"])
+    assert test_results == "No mismatch values"
+
+
+#
+# GET /user/logout tests
+#
+def test_logout_user():
+    """
+    Test that logging out revokes the session token.
+
+    Expected Outcome:
+    - The logout should return a status code of 200.
+    - The token should be rejected afterwards with a status code of 401.
+    """
+    username = random_username()
+    create_user(username, f"{username}@example.com", "secret")
+    created_usernames.append(username)
+    token = json.loads(login_user(username, "secret").text)["token"]
+
+    response = logout_user(token)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           200,
+                                           ["Logout successful"])
+    assert test_results == "No mismatch values"
+
+    response = logout_user(token)
+    test_results = multipoint_verification(response.text, response.status_code,
+                                           401,
+                                           ["Invalid or expired session token"])
+    assert test_results == "No mismatch values"
+
+
+#
+# DELETE /user tests
+#
+def test_delete_user():
+    """
+    Test deleting a user and creating a new one afterwards.
+
+    Expected Outcome:
+    - The deleted user should no longer be found.
+    - A user created after the deletion should get a new, unique ID.
+    """
+    first_username = random_username()
+    response = create_user(first_username, f"{first_username}@example.com", "secret")
+    first_user = json.loads(response.text)
+
+    response = delete_user(first_username)
+    assert response.status_code == 200
+    assert get_user(first_username).status_code == 404
+
+    second_username = random_username()
+    response = create_user(second_username, f"{second_username}@example.com", "secret")
+    second_user = json.loads(response.text)
+    created_usernames.append(second_username)
+
+    assert second_user['id'] != first_user['id']
+
+
+def test_cleanup_created_users():
+    print(f"\n\nPost suite user cleanup...")
+    for username in created_usernames:
+        response = delete_user(username)
+        print(f"Deleted user {username}, status code: {response.status_code}")